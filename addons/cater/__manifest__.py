@@ -22,8 +22,12 @@
         'crm',
         'project',
         'contacts',
-        'mail'
+        'mail',
+        'bus'
     ],
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
     'data': [
         # Security
         'security/security.xml',
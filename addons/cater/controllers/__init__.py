@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 
 from . import portal
+from . import reports
 from . import whatsapp_webhook
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from odoo import http
+from odoo import http, fields, _
+from odoo.exceptions import UserError
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 
+# Bounds of a portal availability search
+MAX_AVAILABILITY_VENUES = 20
+MAX_AVAILABILITY_DAYS = 366
+
 
 class CateringPortal(CustomerPortal):
 
@@ -155,3 +160,25 @@ class CateringPortal(CustomerPortal):
         })
         
         return request.render("cater.portal_my_menu", values)
+
+    @http.route('/my/catering/availability', type='json', auth="user")
+    def portal_venue_availability(self, venues, date_from, date_to, weekdays=None, min_hours=0.0, **kw):
+        """Free time windows of the venues; only the windows are disclosed, not the bookings"""
+        date_from, date_to = fields.Date.to_date(date_from), fields.Date.to_date(date_to)
+        if isinstance(venues, str):
+            venues = [venues]
+        if not venues or len(venues) > MAX_AVAILABILITY_VENUES:
+            raise UserError(_("Please select between 1 and %s venues.", MAX_AVAILABILITY_VENUES))
+        if (date_to - date_from).days > MAX_AVAILABILITY_DAYS:
+            raise UserError(_("Availability can be searched over %s days at most.", MAX_AVAILABILITY_DAYS))
+        try:
+            if weekdays is not None:
+                weekdays = sorted({int(day) for day in weekdays})
+            min_hours = float(min_hours)
+        except (TypeError, ValueError):
+            raise UserError(_("Weekdays and minimum hours must be numbers."))
+        if weekdays and not all(0 <= day <= 6 for day in weekdays):
+            raise UserError(_("Weekdays must be between 0 (Monday) and 6 (Sunday)."))
+        return request.env['cater.event.booking'].sudo().get_venue_availability(
+            venues, date_from, date_to, weekdays=weekdays, min_hours=min_hours,
+        )
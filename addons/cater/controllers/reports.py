@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+from odoo import fields, http
+from odoo.http import content_disposition, request
+from odoo.tools import SQL
+from datetime import datetime
+import csv
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per chunk sent to the browser
+CSV_FETCH_SIZE = 2000
+
+
+class CateringReportController(http.Controller):
+
+    @http.route('/cater/report/<int:wizard_id>/detail.csv', type='http', auth='user')
+    def report_detail_csv(self, wizard_id, **kwargs):
+        """Stream the detail rows of a report wizard as CSV.
+
+        Rows are read through a server-side cursor and sent chunk by chunk as
+        they are fetched: nothing is stored and the file is never held whole
+        in memory.
+        """
+        wizard = request.env['cater.report.wizard'].browse(wizard_id).exists()
+        if not wizard:
+            return request.not_found()
+        
+        _model, _domain, columns = wizard._get_detail_spec()
+        select, formatters = wizard._get_detail_select()
+        headers = [header for header, _path in columns]
+        title = dict(wizard._fields['report_type'].selection)[wizard.report_type]
+        rows = self._stream_csv(request.env.registry, select, headers, formatters)
+        return request.make_response(rows, headers=[
+            ('Content-Type', 'text/csv; charset=utf-8'),
+            ('Content-Disposition', content_disposition(f"{title} - Details.csv")),
+            ('Cache-Control', 'no-store'),
+        ])
+
+    def _stream_csv(self, registry, select, headers, formatters):
+        """Generator of CSV chunks read from a cursor of its own.
+
+        The response body is produced after the request cursor is closed, so
+        the rows are read from a new cursor living as long as the download.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        yield buffer.getvalue().encode('utf-8')
+        
+        with registry.cursor() as cr:
+            cr.execute(SQL("DECLARE cater_report_csv NO SCROLL CURSOR FOR %s", select))
+            while True:
+                cr.execute(SQL("FETCH FORWARD %s FROM cater_report_csv", CSV_FETCH_SIZE))
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                buffer.seek(0)
+                buffer.truncate()
+                for row in rows:
+                    writer.writerow([
+                        self._csv_value(format_value(value))
+                        for format_value, value in zip(formatters, row)
+                    ])
+                yield buffer.getvalue().encode('utf-8')
+            cr.execute(SQL("CLOSE cater_report_csv"))
+
+    def _csv_value(self, value):
+        if isinstance(value, datetime):
+            return fields.Datetime.to_string(value)
+        return value
@@ -1,9 +1,15 @@
+from . import product_mixin
 from . import menu_item
 from . import event_booking
 from . import catering_service
 from . import feedback
+from . import feedback_stats
 from . import whatsapp_integration
 from . import res_partner_extend
 from . import account_move_extend
 from . import dashboard
-from . import reports
\ No newline at end of file
+from . import stats_monthly
+from . import ir_websocket
+from . import reports
+from . import report_job
+from . import report_cache
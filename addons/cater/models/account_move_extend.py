@@ -14,3 +14,42 @@ class AccountMoveExtend(models.Model):
     event_date = fields.Datetime('Event Date', related='catering_booking_id.event_date', store=True)
     event_name = fields.Char('Event Name', related='catering_booking_id.event_name', store=True)
     guest_count = fields.Integer('Guest Count', related='catering_booking_id.guest_count', store=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        if moves.filtered('catering_booking_id'):
+            self.env['cater.dashboard'].clear_dashboard_cache()
+        return moves
+
+    def write(self, vals):
+        # Catering invoices feed the financial reports
+        if 'catering_booking_id' in vals or self.filtered('catering_booking_id'):
+            self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        if self.filtered('catering_booking_id'):
+            self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().unlink()
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    # Payments change the residual amounts of the invoices without writing them
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        partials._clear_catering_cache()
+        return partials
+
+    def unlink(self):
+        self._clear_catering_cache()
+        return super().unlink()
+
+    def _clear_catering_cache(self):
+        moves = self.debit_move_id.move_id | self.credit_move_id.move_id
+        if moves.filtered('catering_booking_id'):
+            self.env['cater.dashboard'].clear_dashboard_cache()
@@ -4,7 +4,9 @@ from odoo import models, fields, api
 class CateringService(models.Model):
     _name = 'cater.service'
     _description = 'Catering Service'
+    _inherit = ['cater.product.mixin']
     _order = 'name'
+    _product_sync_fields = ['name', 'price']
 
     name = fields.Char('Service Name', required=True)
     description = fields.Text('Description')
@@ -19,4 +21,13 @@ class CateringService(models.Model):
         ('other', 'Other')
     ], 'Service Type', required=True)
     duration = fields.Float('Duration (Hours)', default=1.0)
-    active = fields.Boolean('Active', default=True)
\ No newline at end of file
+    active = fields.Boolean('Active', default=True)
+
+    def _get_product_values(self):
+        return dict(super()._get_product_values(), list_price=self.price)
+
+    def write(self, vals):
+        if 'price' in vals:
+            # The line prices, hence the booking amounts, follow the item price
+            self.env['cater.booking.service.line'].sudo().search([('service_id', 'in', self.ids)])._mark_stats_dirty()
+        return super().write(vals)
@@ -1,31 +1,291 @@
-from odoo import models, fields, api, tools
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL, date_utils
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 import json
 import logging
+import psycopg2
+import threading
+import time
 
 _logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def _measure_section():
+    """Measure wall time (ms), SQL queries and rows fetched in the current thread"""
+    stats = {'duration': 0.0, 'query_count': 0, 'row_count': 0}
+
+    def query_hook(cr, query, params, start, delay):
+        stats['query_count'] += 1
+        if cr.description is not None:
+            stats['row_count'] += max(cr.rowcount, 0)
+
+    thread = threading.current_thread()
+    if not hasattr(thread, 'query_hooks'):
+        thread.query_hooks = []
+    thread.query_hooks.append(query_hook)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['duration'] = round((time.perf_counter() - start) * 1000, 1)
+        thread.query_hooks.remove(query_hook)
+
+
+# Bus channel and notification type used to push live updates to dashboards
+DASHBOARD_CHANNEL = 'cater.dashboard'
+DASHBOARD_DELTA = 'cater.dashboard/delta'
+
+# Activity feed sources: kind -> (model, partner field, name column, detail column)
+ACTIVITY_SOURCES = {
+    'booking': ('cater.event.booking', 'partner_id', 'event_name', 'event_type'),
+    'feedback': ('cater.feedback', 'partner_id', 'rating', 'event_name'),
+    'whatsapp': ('cater.whatsapp.log', None, 'to_number', 'status'),
+}
+
+# Dashboard panels: name -> (key in get_dashboard_data, section builder)
+DASHBOARD_PANELS = {
+    'kpis': ('kpis', '_get_kpi_data'),
+    'charts': ('charts', '_get_chart_data'),
+    'activity': ('recent_activity', '_get_recent_activity'),
+    'feedback': ('feedback_summary', '_get_feedback_summary'),
+    'upcoming': ('upcoming_events', '_get_upcoming_events'),
+    'financial': ('financial_summary', '_get_financial_summary'),
+}
+
+
 class CateringDashboard(models.Model):
     _name = 'cater.dashboard'
     _description = 'Catering Dashboard Data'
 
     @api.model
-    @tools.ormcache('self.env.uid')
-    def get_dashboard_data(self):
-        """Get comprehensive dashboard data with caching"""
+    def get_dashboard_data(self, debug=False):
+        """Get comprehensive dashboard data with caching.
+
+        With debug=True, the cost of each panel is returned under 'debug'.
+        A panel that fails to compute is served empty, and its error is
+        returned under 'errors'.
+        """
+        data, stats, errors = {}, {}, {}
+        for panel, (key, _method) in DASHBOARD_PANELS.items():
+            try:
+                data[key], stats[panel] = self._get_panel(panel)
+            except Exception as e:
+                data[key], stats[panel] = self._get_empty_dashboard_data()[key], {'error': str(e)}
+                errors[panel] = str(e)
+        if errors:
+            data['errors'] = errors
+        if debug:
+            data['debug'] = stats
+        return data
+    
+    @api.model
+    def get_dashboard_panel(self, panel, debug=False):
+        """Get a single dashboard panel, cached independently of the others.
+
+        With debug=True, returns {'data': panel, 'debug': cost of the panel}.
+        """
+        if panel not in DASHBOARD_PANELS:
+            raise UserError(_("Unknown dashboard panel: %s", panel))
+        data, stats = self._get_panel(panel)
+        if debug:
+            return {'data': data, 'debug': stats}
+        return data
+    
+    def _get_panel(self, panel):
+        """Return the data of a panel and the cost of producing it.
+
+        Errors are raised, see _compute_panel(); the panel is not cached.
+        """
+        stats = {'cached': True}
+        data = self.env['cater.dashboard.cache']._get_or_compute(
+            self._get_cache_scope(), panel, lambda: self._compute_panel(panel, stats=stats)
+        )
+        return data, stats
+    
+    def _compute_panel(self, panel, source='request', stats=None):
+        """Compute one dashboard panel from the live tables.
+
+        Wall time, SQL queries, rows fetched and errors are recorded in
+        cater.dashboard.timing and copied into the optional stats dict.
+        Errors are logged and re-raised.
+        """
+        _key, method = DASHBOARD_PANELS[panel]
+        measured = {}
         try:
-            return {
-                'kpis': self._get_kpi_data(),
-                'charts': self._get_chart_data(),
-                'recent_activity': self._get_recent_activity(),
-                'feedback_summary': self._get_feedback_summary(),
-                'upcoming_events': self._get_upcoming_events(),
-                'financial_summary': self._get_financial_summary()
-            }
+            with _measure_section() as measured, self.env.cr.savepoint():
+                return getattr(self, method)()
         except Exception as e:
-            _logger.error(f"Error getting dashboard data: {str(e)}")
-            return self._get_empty_dashboard_data()
+            _logger.exception(f"Error computing dashboard panel {panel}")
+            measured['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            measured['cached'] = False
+            if stats is not None:
+                stats.update(measured)
+            self.env['cater.dashboard.timing'].sudo()._record(
+                self._get_cache_scope(), panel, source, measured
+            )
+    
+    @api.model
+    def get_dashboard_watermark(self):
+        """Current data watermark of the dashboard.
+
+        'version' is the data version of cater.dashboard.cache, bumped by every
+        change to bookings and feedback, including deletions. 'since' is the
+        start of the oldest transaction in progress: records committed after
+        the watermark was taken were written at or after it, even when their
+        transaction started before the latest committed write.
+        """
+        self.env.cr.execute("""
+            SELECT MIN(xact_start) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database() AND xact_start IS NOT NULL
+        """)
+        since = self.env.cr.fetchone()[0] or fields.Datetime.now()
+        return {
+            'version': self.env['cater.dashboard.cache']._get_data_version(),
+            'since': since.isoformat(' '),
+        }
+    
+    @api.model
+    def get_dashboard_changes(self, watermark=None):
+        """Get the dashboard changes since the watermark of a previous call.
+
+        Returns {'changed': False, 'watermark': ...} when nothing changed, so
+        the client can poll cheaply. Otherwise returns the new watermark, the
+        KPIs and the activity entries of the records created or updated since
+        the previous watermark; entries already sent may be sent again.
+        """
+        current = self.get_dashboard_watermark()
+        if watermark and watermark.get('version') == current['version']:
+            # Keep the older horizon: transactions in progress then may still commit
+            return {'changed': False, 'watermark': watermark}
+        
+        since = None
+        if watermark and watermark.get('since'):
+            since = datetime.fromisoformat(watermark['since'])
+        return {
+            'changed': True,
+            'watermark': current,
+            'kpis': self.get_dashboard_panel('kpis'),
+            'recent_activity': json.loads(json.dumps(self._get_recent_activity(since), default=date_utils.json_default)),
+        }
+    
+    @api.model
+    def _notify_bookings_confirmed(self, bookings, previous_states):
+        """Publish KPI deltas for newly confirmed bookings on the dashboard channel"""
+        month_start = fields.Datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        notifications = []
+        for booking in bookings:
+            kpis = {}
+            if booking.create_date and booking.create_date >= month_start:
+                kpis.update({'total_bookings': 1, 'total_revenue': booking.total_amount})
+            if previous_states.get(booking.id) == 'draft':
+                kpis['pending_bookings'] = -1
+            notifications.append((DASHBOARD_CHANNEL, DASHBOARD_DELTA, {
+                'event': 'booking_confirmed',
+                'kpis': kpis,
+                'activity': {
+                    'id': booking.id,
+                    'type': 'booking',
+                    'title': f"Booking confirmed: {booking.event_name}",
+                    'description': f"{booking.partner_id.name} - {booking.event_type}",
+                    'date': fields.Datetime.to_string(fields.Datetime.now()),
+                    'icon': 'calendar'
+                },
+            }))
+        self.env['bus.bus']._sendmany(notifications)
+    
+    @api.model
+    def _notify_feedback_received(self, feedback):
+        """Publish new feedback on the dashboard channel.
+
+        Averages cannot be patched from a single rating, so the delta asks the
+        client to refresh its KPIs through get_dashboard_changes.
+        """
+        self.env['bus.bus']._sendmany([(DASHBOARD_CHANNEL, DASHBOARD_DELTA, {
+            'event': 'feedback_received',
+            'refresh': True,
+            'activity': {
+                'id': record.id,
+                'type': 'feedback',
+                'title': f"New feedback: {record.rating} stars",
+                'description': f"{record.partner_id.name} - {record.booking_id.event_name}",
+                'date': fields.Datetime.to_string(record.create_date or fields.Datetime.now()),
+                'icon': 'star'
+            },
+        }) for record in feedback])
+    
+    @api.model
+    def _cron_prewarm_cache(self):
+        """Cron job precomputing the cached panels of every shared access scope.
+
+        Only panels missing from the cache or past their TTL are recomputed;
+        their cost is recorded in cater.dashboard.timing like any other.
+        """
+        for dashboard in self._get_prewarm_dashboards():
+            scope_key = dashboard._get_cache_scope()
+            for panel in DASHBOARD_PANELS:
+                try:
+                    dashboard.env['cater.dashboard.cache']._get_or_compute(
+                        scope_key, panel, lambda panel=panel: dashboard._compute_panel(panel, source='prewarm')
+                    )
+                except Exception:
+                    # Already logged and recorded; warm the other panels anyway
+                    continue
+    
+    def _get_prewarm_dashboards(self):
+        """Dashboard environments of one representative user per company and shared scope.
+
+        Client scopes are per user and are not worth precomputing.
+        """
+        manager_group = self.env.ref('cater.catering_manager_group')
+        staff_group = self.env.ref('cater.catering_staff_group')
+        client_group = self.env.ref('cater.catering_client_group')
+        Users = self.env['res.users'].sudo()
+        dashboards = []
+        for company in self.env['res.company'].sudo().search([]):
+            domain = [
+                ('share', '=', False),
+                ('company_ids', 'in', company.ids),
+                ('groups_id', 'not in', client_group.ids),
+            ]
+            manager = Users.search(domain + [('groups_id', 'in', manager_group.ids)], limit=1)
+            staff = Users.search(domain + [
+                ('groups_id', 'in', staff_group.ids),
+                ('groups_id', 'not in', manager_group.ids),
+            ], limit=1)
+            for user in manager | staff:
+                dashboards.append(self.with_user(user).with_company(company))
+        return dashboards
+    
+    @api.model
+    def _schedule_prewarm(self):
+        """Run the pre-warming cron as soon as possible, e.g. after a bulk import"""
+        cron = self.env.ref('cater.catering_dashboard_prewarm_cron', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+    
+    def _get_cache_scope(self):
+        """Cache key describing what the current user is allowed to see.
+
+        Staff and managers are not restricted by record rules and share one
+        entry per company; clients only see their own bookings and get their own.
+        """
+        user = self.env.user
+        if user.has_group('cater.catering_client_group'):
+            scope = f'user_{user.id}'
+        elif user.has_group('cater.catering_manager_group'):
+            scope = 'manager'
+        elif user.has_group('cater.catering_staff_group'):
+            scope = 'staff'
+        else:
+            scope = f'user_{user.id}'
+        return f'{self.env.company.id}:{scope}'
     
     def _get_empty_dashboard_data(self):
         """Return empty dashboard data structure"""
@@ -69,98 +329,168 @@ class CateringDashboard(models.Model):
     
     @api.model
     def clear_dashboard_cache(self):
-        """Clear dashboard cache when data changes"""
-        self.env.invalidate_all()
-        # Clear ormcache for the get_dashboard_data method
-        # Since it's cached by self.env.uid, we clear for current user
-        try:
-            self.get_dashboard_data.clear_cache(self, self.env.uid)
-        except (AttributeError, TypeError):
-            # Fallback: invalidate all if clear_cache fails
-            self.env.invalidate_all()
+        """Invalidate the dashboard cache when data feeding it changes.
+
+        The invalidation is coalesced to once per transaction and shared by all
+        workers through the cache version table.
+        """
+        self.env['cater.dashboard.cache']._invalidate()
     
     def _get_kpi_data(self):
         """Get Key Performance Indicators"""
+        figures = self._get_booking_figures()
+        return {
+            'total_bookings': figures['month_count'],
+            'booking_growth': self._calculate_growth(figures['month_count'], figures['last_month_count']),
+            'total_revenue': figures['month_revenue'],
+            'revenue_growth': self._calculate_growth(figures['month_revenue'], figures['last_month_revenue']),
+            'avg_satisfaction': round(figures['month_avg_rating'], 1),
+            'completed_events': figures['month_completed'],
+            'active_customers': figures['month_customers'],
+            'pending_bookings': figures['draft_count']
+        }
+    
+    def _get_booking_figures(self):
+        """KPI and financial figures of the bookings from a single scan.
+
+        Confirmed/completed bookings of this month, last month and this year
+        plus all drafts are read once and split with FILTER aggregates. Record
+        rules apply through the booking search query; this month's average
+        rating comes from a feedback sub-select built the same way.
+        """
         today = fields.Date.today()
         month_start = today.replace(day=1)
-        last_month_start = (month_start - timedelta(days=1)).replace(day=1)
-        
-        # This month's data
-        this_month_bookings = self.env['cater.event.booking'].search([
-            ('create_date', '>=', month_start),
-            ('state', 'in', ['confirmed', 'completed'])
-        ])
+        last_month_start = month_start - relativedelta(months=1)
+        year_start = today.replace(month=1, day=1)
+        won = ['confirmed', 'completed']
         
-        # Last month's data for comparison
-        last_month_bookings = self.env['cater.event.booking'].search([
-            ('create_date', '>=', last_month_start),
-            ('create_date', '<', month_start),
-            ('state', 'in', ['confirmed', 'completed'])
+        query = self.env['cater.event.booking']._search([
+            '|', ('state', '=', 'draft'),
+            '&', ('state', 'in', won), ('create_date', '>=', min(last_month_start, year_start)),
         ])
+        feedback_query = self.env['cater.feedback']._search([('create_date', '>=', month_start)])
         
-        # Revenue calculations
-        this_month_revenue = sum(this_month_bookings.mapped('total_amount'))
-        last_month_revenue = sum(last_month_bookings.mapped('total_amount'))
+        def column(name):
+            return SQL.identifier(query.table, name)
         
-        # Growth calculations
-        booking_growth = self._calculate_growth(len(this_month_bookings), len(last_month_bookings))
-        revenue_growth = self._calculate_growth(this_month_revenue, last_month_revenue)
+        def won_between(date_from, date_to=None):
+            condition = SQL("%s = ANY(%s) AND %s >= %s", column('state'), won, column('create_date'), date_from)
+            if date_to:
+                condition = SQL("%s AND %s < %s", condition, column('create_date'), date_to)
+            return condition
         
-        # Average satisfaction
-        feedback_this_month = self.env['cater.feedback'].search([
-            ('create_date', '>=', month_start)
-        ])
-        avg_rating = 0
-        if feedback_this_month:
-            ratings = [int(f.rating) for f in feedback_this_month if f.rating]
-            avg_rating = sum(ratings) / len(ratings) if ratings else 0
+        def total(name, condition):
+            return SQL("COALESCE(SUM(%s) FILTER (WHERE %s), 0)", column(name), condition)
         
-        return {
-            'total_bookings': len(this_month_bookings),
-            'booking_growth': booking_growth,
-            'total_revenue': this_month_revenue,
-            'revenue_growth': revenue_growth,
-            'avg_satisfaction': round(avg_rating, 1),
-            'completed_events': len(this_month_bookings.filtered(lambda b: b.state == 'completed')),
-            'active_customers': len(this_month_bookings.mapped('partner_id')),
-            'pending_bookings': len(self.env['cater.event.booking'].search([('state', '=', 'draft')]))
+        this_month = won_between(month_start)
+        last_month = won_between(last_month_start, month_start)
+        this_year = won_between(year_start)
+        aggregates = {
+            'month_count': SQL("COUNT(*) FILTER (WHERE %s)", this_month),
+            'month_revenue': total('total_amount', this_month),
+            'month_paid': total('paid_amount', this_month),
+            'month_balance': total('balance_due', this_month),
+            'month_completed': SQL("COUNT(*) FILTER (WHERE %s AND %s = 'completed')", this_month, column('state')),
+            'month_customers': SQL("COUNT(DISTINCT %s) FILTER (WHERE %s)", column('partner_id'), this_month),
+            'last_month_count': SQL("COUNT(*) FILTER (WHERE %s)", last_month),
+            'last_month_revenue': total('total_amount', last_month),
+            'year_revenue': total('total_amount', this_year),
+            'year_paid': total('paid_amount', this_year),
+            'year_balance': total('balance_due', this_year),
+            'draft_count': SQL("COUNT(*) FILTER (WHERE %s = 'draft')", column('state')),
+            'month_avg_rating': SQL("COALESCE((%s), 0)", feedback_query.select(
+                SQL("AVG(%s::int)", SQL.identifier(feedback_query.table, 'rating'))
+            )),
         }
+        self.env['cater.event.booking'].flush_model([
+            'state', 'create_date', 'partner_id', 'total_amount', 'paid_amount', 'balance_due',
+        ])
+        self.env['cater.feedback'].flush_model(['create_date', 'rating'])
+        self.env.cr.execute(query.select(*aggregates.values()))
+        return dict(zip(aggregates, self.env.cr.fetchone()))
     
     def _get_chart_data(self):
         """Get data for dashboard charts"""
+        booking_trends = self._get_booking_trends()
         return {
-            'booking_trends': self._get_booking_trends(),
-            'revenue_trends': self._get_revenue_trends(),
+            'booking_trends': booking_trends,
+            'revenue_trends': self._get_revenue_trends(booking_trends),
             'event_type_distribution': self._get_event_type_distribution(),
             'rating_distribution': self._get_rating_distribution(),
             'monthly_performance': self._get_monthly_performance()
         }
     
+    def _get_month_starts(self, months):
+        """Return the first day of each of the last `months` months, oldest first"""
+        current_month = fields.Date.today().replace(day=1)
+        return [current_month - relativedelta(months=i) for i in reversed(range(months))]
+    
+    def _get_monthly_buckets(self, date_field, months):
+        """Aggregate confirmed/completed bookings per calendar month in one query.
+
+        Bookings are grouped on date_trunc('month', date_field) and joined to
+        their feedback, so count, revenue and average rating of every bucket
+        come back from a single grouped scan. Record rules are applied through
+        the booking search query. Months without bookings are returned as zeros.
+        """
+        month_starts = self._get_month_starts(months)
+        Booking = self.env['cater.event.booking']
+        query = Booking._search([
+            (date_field, '>=', month_starts[0]),
+            (date_field, '<', month_starts[-1] + relativedelta(months=1)),
+            ('state', 'in', ['confirmed', 'completed'])
+        ])
+        Booking.flush_model([date_field, 'state', 'total_amount'])
+        self.env['cater.feedback'].flush_model(['booking_id', 'rating'])
+        # At most one feedback per booking (unique constraint), so the join
+        # never duplicates booking rows in the sums below.
+        feedback_alias = 'cater_booking_feedback'
+        query.add_join('LEFT JOIN', feedback_alias, 'cater_feedback', SQL(
+            "%s = %s",
+            SQL.identifier(feedback_alias, 'booking_id'),
+            SQL.identifier(query.table, 'id'),
+        ))
+        self.env.cr.execute(SQL(
+            """
+            SELECT date_trunc('month', %s)::date AS month,
+                   COUNT(%s) AS bookings,
+                   COALESCE(SUM(%s), 0) AS revenue,
+                   AVG(%s::int) AS avg_rating
+              FROM %s
+             WHERE %s
+          GROUP BY 1
+            """,
+            SQL.identifier(query.table, date_field),
+            SQL.identifier(query.table, 'id'),
+            SQL.identifier(query.table, 'total_amount'),
+            SQL.identifier(feedback_alias, 'rating'),
+            query.from_clause,
+            query.where_clause,
+        ))
+        rows = {month: (bookings, revenue, avg_rating) for month, bookings, revenue, avg_rating in self.env.cr.fetchall()}
+        
+        buckets = []
+        for month_start in month_starts:
+            bookings, revenue, avg_rating = rows.get(month_start, (0, 0.0, None))
+            buckets.append({
+                'month_start': month_start,
+                'bookings': bookings,
+                'revenue': revenue,
+                'avg_rating': float(avg_rating or 0),
+            })
+        return buckets
+    
     def _get_booking_trends(self):
         """Get booking trends for the last 6 months"""
-        data = []
-        for i in range(6):
-            date = fields.Date.today() - timedelta(days=30*i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            
-            bookings = self.env['cater.event.booking'].search([
-                ('create_date', '>=', month_start),
-                ('create_date', '<=', month_end),
-                ('state', 'in', ['confirmed', 'completed'])
-            ])
-            
-            data.append({
-                'month': month_start.strftime('%B %Y'),
-                'bookings': len(bookings),
-                'revenue': sum(bookings.mapped('total_amount'))
-            })
-        
-        return list(reversed(data))
+        return [{
+            'month': bucket['month_start'].strftime('%B %Y'),
+            'bookings': bucket['bookings'],
+            'revenue': bucket['revenue']
+        } for bucket in self._get_monthly_buckets('create_date', 6)]
     
-    def _get_revenue_trends(self):
+    def _get_revenue_trends(self, booking_trends=None):
         """Get revenue trends by month"""
-        trends = self._get_booking_trends()
+        trends = booking_trends if booking_trends is not None else self._get_booking_trends()
         return [{
             'month': item['month'],
             'revenue': item['revenue']
@@ -168,6 +498,18 @@ class CateringDashboard(models.Model):
     
     def _get_event_type_distribution(self):
         """Get distribution of event types"""
+        Stats = self.env['cater.stats.monthly']
+        if Stats._can_serve_user():
+            selection = dict(self.env['cater.event.booking']._fields['event_type'].selection)
+            rows = Stats.read_summary(
+                self._get_month_starts(12)[0], fields.Date.today(),
+                states=['confirmed', 'completed'], groupby=['event_type']
+            )
+            return [{
+                'type': selection.get(row['event_type'], row['event_type']),
+                'count': row['booking_count']
+            } for row in rows if row['booking_count']]
+        
         bookings = self.env['cater.event.booking'].search([
             ('state', 'in', ['confirmed', 'completed']),
             ('create_date', '>=', fields.Date.today() - timedelta(days=365))
@@ -181,92 +523,148 @@ class CateringDashboard(models.Model):
         return [{'type': k, 'count': v} for k, v in event_types.items()]
     
     def _get_rating_distribution(self):
-        """Get distribution of customer ratings"""
-        feedback = self.env['cater.feedback'].search([
-            ('create_date', '>=', fields.Date.today() - timedelta(days=365))
-        ])
-        
-        ratings = {}
-        for f in feedback:
-            if f.rating:
-                star_label = f"{f.rating} Star{'s' if f.rating != '1' else ''}"
-                ratings[star_label] = ratings.get(star_label, 0) + 1
-        
-        return [{'rating': k, 'count': v} for k, v in ratings.items()]
+        """Get distribution of customer ratings over the feedback of the last 365 days.
+
+        Feedback is bucketed on its own date, so this is not read from the
+        monthly rollup, which counts it in the month of its booking.
+        """
+        groups = self.env['cater.feedback']._read_group(
+            [('create_date', '>=', fields.Date.today() - timedelta(days=365)), ('rating', '!=', False)],
+            ['rating'], ['__count'],
+        )
+        return [{
+            'rating': f"{rating} Star{'s' if rating != '1' else ''}",
+            'count': count,
+        } for rating, count in groups]
     
     def _get_monthly_performance(self):
         """Get monthly performance metrics"""
-        data = []
-        for i in range(12):
-            date = fields.Date.today() - timedelta(days=30*i)
-            month_start = date.replace(day=1)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            
-            bookings = self.env['cater.event.booking'].search([
-                ('event_date', '>=', month_start),
-                ('event_date', '<=', month_end),
-                ('state', 'in', ['confirmed', 'completed'])
-            ])
-            
-            feedback = self.env['cater.feedback'].search([
-                ('booking_id', 'in', bookings.ids)
-            ])
-            
-            avg_rating = 0
-            if feedback:
-                ratings = [int(f.rating) for f in feedback if f.rating]
-                avg_rating = sum(ratings) / len(ratings) if ratings else 0
-            
-            data.append({
-                'month': month_start.strftime('%b %Y'),
-                'bookings': len(bookings),
-                'revenue': sum(bookings.mapped('total_amount')),
-                'satisfaction': round(avg_rating, 1)
-            })
-        
-        return list(reversed(data))
+        return [{
+            'month': bucket['month_start'].strftime('%b %Y'),
+            'bookings': bucket['bookings'],
+            'revenue': bucket['revenue'],
+            'satisfaction': round(bucket['avg_rating'], 1)
+        } for bucket in self._get_monthly_buckets('event_date', 12)]
     
-    def _get_recent_activity(self):
-        """Get recent booking and feedback activity"""
-        recent_bookings = self.env['cater.event.booking'].search([
-            ('create_date', '>=', fields.Datetime.now() - timedelta(days=7))
-        ], order='create_date desc', limit=5)
-        
-        recent_feedback = self.env['cater.feedback'].search([
-            ('create_date', '>=', fields.Datetime.now() - timedelta(days=7))
-        ], order='create_date desc', limit=5)
-        
-        activity = []
+    def _get_recent_activity(self, since=None):
+        """Get recent booking and feedback activity, optionally only records written from `since`"""
+        date_from = fields.Datetime.now() - timedelta(days=7)
+        return self.get_activity_feed(
+            limit=10, since=date_from, written_since=since, kinds=['booking', 'feedback'],
+        )['entries']
+    
+    @api.model
+    def get_activity_feed(self, limit=20, before=None, since=None, kinds=None, written_since=None):
+        """Activity feed of bookings, feedback and WhatsApp messages, newest first.
+
+        All sources are read in one UNION ALL query, already joined to the
+        names they display, each branch filtered by its record rules. Pages
+        are fetched by keyset: pass the 'cursor' of the last entry received
+        as `before` to get the next (older) page. WhatsApp messages are only
+        included for users allowed to read the message log.
+
+        `since` filters on the creation date shown by the entries,
+        `written_since` on the last write date of their records.
+
+        Returns {'entries': [...], 'next_cursor': cursor or False}.
+        """
+        kinds = set(kinds or ACTIVITY_SOURCES)
+        if not self.env['cater.whatsapp.log'].has_access('read'):
+            kinds.discard('whatsapp')
+        branches = [
+            self._activity_feed_branch(kind, limit + 1, before, since, written_since)
+            for kind in ACTIVITY_SOURCES if kind in kinds
+        ]
+        if not branches:
+            return {'entries': [], 'next_cursor': False}
         
-        for booking in recent_bookings:
-            activity.append({
-                'type': 'booking',
-                'title': f"New booking: {booking.event_name}",
-                'description': f"{booking.partner_id.name} - {booking.event_type}",
-                'date': booking.create_date,
-                'icon': 'calendar'
-            })
+        self.env.cr.execute(SQL(
+            """
+            SELECT kind, id, date, name, partner_name, detail
+              FROM (%s) AS feed
+          ORDER BY date DESC, kind DESC, id DESC
+             LIMIT %s
+            """,
+            SQL(" UNION ALL ").join(SQL("(%s)", branch) for branch in branches),
+            limit + 1,
+        ))
+        rows = self.env.cr.fetchall()
+        entries = [self._format_activity(*row) for row in rows[:limit]]
+        has_more = len(rows) > limit
+        return {'entries': entries, 'next_cursor': entries[-1]['cursor'] if has_more else False}
+    
+    def _activity_feed_branch(self, kind, limit, before=None, since=None, written_since=None):
+        """SELECT of one activity source in the column layout of the feed"""
+        model, partner_field, name_column, detail = ACTIVITY_SOURCES[kind]
+        Model = self.env[model]
+        Model.flush_model()
+        query = Model._search([])
+        table = query.table
+        date = SQL.identifier(table, 'create_date')
         
-        for feedback in recent_feedback:
-            activity.append({
-                'type': 'feedback',
-                'title': f"New feedback: {feedback.rating} stars",
-                'description': f"{feedback.partner_id.name} - {feedback.booking_id.event_name}",
-                'date': feedback.create_date,
-                'icon': 'star'
-            })
+        partner_name = SQL("NULL::varchar")
+        if partner_field:
+            partner_alias = query.make_alias(table, partner_field)
+            query.add_join('LEFT JOIN', partner_alias, 'res_partner', SQL(
+                "%s = %s", SQL.identifier(partner_alias, 'id'), SQL.identifier(table, partner_field),
+            ))
+            partner_name = SQL.identifier(partner_alias, 'name')
+        if kind == 'feedback':
+            self.env['cater.event.booking'].flush_model(['event_name'])
+            booking_alias = query.make_alias(table, 'booking_id')
+            query.add_join('LEFT JOIN', booking_alias, 'cater_event_booking', SQL(
+                "%s = %s", SQL.identifier(booking_alias, 'id'), SQL.identifier(table, 'booking_id'),
+            ))
+            detail = SQL.identifier(booking_alias, detail)
+        else:
+            detail = SQL.identifier(table, detail)
         
-        # Sort by date
-        activity.sort(key=lambda x: x['date'], reverse=True)
-        return activity[:10]
+        if since:
+            query.add_where(SQL("%s > %s", date, since))
+        if written_since:
+            query.add_where(SQL("%s >= %s", SQL.identifier(table, 'write_date'), written_since))
+        if before:
+            before_date, before_kind, before_id = before
+            query.add_where(SQL(
+                "(%s, %s::varchar, %s) < (%s::timestamp, %s::varchar, %s)",
+                date, kind, SQL.identifier(table, 'id'), before_date, before_kind, before_id,
+            ))
+        query.order = SQL("%s DESC, %s DESC", date, SQL.identifier(table, 'id'))
+        query.limit = limit
+        return query.select(
+            SQL("%s::varchar AS kind", kind),
+            SQL("%s AS id", SQL.identifier(table, 'id')),
+            SQL("%s AS date", date),
+            SQL("%s::varchar AS name", SQL.identifier(table, name_column)),
+            SQL("%s AS partner_name", partner_name),
+            SQL("%s::varchar AS detail", detail),
+        )
+    
+    def _format_activity(self, kind, record_id, date, name, partner_name, detail):
+        """Build a dashboard activity entry from a row of the activity feed"""
+        if kind == 'booking':
+            title, description, icon = f"New booking: {name}", f"{partner_name} - {detail}", 'calendar'
+        elif kind == 'feedback':
+            title, description, icon = f"New feedback: {name} stars", f"{partner_name} - {detail}", 'star'
+        else:
+            title, description, icon = f"WhatsApp message to {name}", detail, 'whatsapp'
+        return {
+            'id': record_id,
+            'type': kind,
+            'title': title,
+            'description': description,
+            'date': date,
+            'icon': icon,
+            'cursor': [date.isoformat(), kind, record_id],
+        }
     
     def _get_feedback_summary(self):
         """Get feedback summary statistics"""
-        feedback = self.env['cater.feedback'].search([
+        stats = self.env['cater.feedback.stats'].compute([
             ('create_date', '>=', fields.Date.today() - timedelta(days=30))
         ])
         
-        if not feedback:
+        if not stats['total_feedback']:
             return {
                 'total_feedback': 0,
                 'avg_rating': 0,
@@ -274,29 +672,21 @@ class CateringDashboard(models.Model):
                 'response_rate': 0
             }
         
-        ratings = [int(f.rating) for f in feedback if f.rating]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-        
-        recommendations = len(feedback.filtered('would_recommend'))
-        recommendation_rate = (recommendations / len(feedback)) * 100 if feedback else 0
-        
         # Calculate response rate (feedback vs completed bookings)
         completed_bookings = self.env['cater.event.booking'].search([
             ('state', '=', 'completed'),
             ('event_date', '>=', fields.Date.today() - timedelta(days=30))
         ])
-        response_rate = (len(feedback) / len(completed_bookings)) * 100 if completed_bookings else 0
+        response_rate = (stats['total_feedback'] / len(completed_bookings)) * 100 if completed_bookings else 0
         
         return {
-            'total_feedback': len(feedback),
-            'avg_rating': round(avg_rating, 1),
-            'recommendation_rate': round(recommendation_rate, 1),
+            'total_feedback': stats['total_feedback'],
+            'avg_rating': round(stats['avg_rating'], 1),
+            'recommendation_rate': stats['recommendation_rate'],
             'response_rate': round(response_rate, 1),
+            'nps_score': stats['nps']['score'],
             'detailed_ratings': {
-                'food_quality': round(sum(feedback.mapped('food_quality')) / len(feedback), 1) if feedback else 0,
-                'service_quality': round(sum(feedback.mapped('service_quality')) / len(feedback), 1) if feedback else 0,
-                'presentation': round(sum(feedback.mapped('presentation')) / len(feedback), 1) if feedback else 0,
-                'timeliness': round(sum(feedback.mapped('timeliness')) / len(feedback), 1) if feedback else 0,
+                field: round(values['mean'], 1) for field, values in stats['sub_scores'].items()
             }
         }
     
@@ -328,32 +718,17 @@ class CateringDashboard(models.Model):
     
     def _get_financial_summary(self):
         """Get financial summary for current period"""
-        today = fields.Date.today()
-        month_start = today.replace(day=1)
-        year_start = today.replace(month=1, day=1)
-        
-        # Monthly financials
-        monthly_bookings = self.env['cater.event.booking'].search([
-            ('create_date', '>=', month_start),
-            ('state', 'in', ['confirmed', 'completed'])
-        ])
-        
-        # Yearly financials
-        yearly_bookings = self.env['cater.event.booking'].search([
-            ('create_date', '>=', year_start),
-            ('state', 'in', ['confirmed', 'completed'])
-        ])
-        
+        figures = self._get_booking_figures()
         return {
             'monthly': {
-                'revenue': sum(monthly_bookings.mapped('total_amount')),
-                'paid': sum(monthly_bookings.mapped('paid_amount')),
-                'pending': sum(monthly_bookings.mapped('balance_due'))
+                'revenue': figures['month_revenue'],
+                'paid': figures['month_paid'],
+                'pending': figures['month_balance']
             },
             'yearly': {
-                'revenue': sum(yearly_bookings.mapped('total_amount')),
-                'paid': sum(yearly_bookings.mapped('paid_amount')),
-                'pending': sum(yearly_bookings.mapped('balance_due'))
+                'revenue': figures['year_revenue'],
+                'paid': figures['year_paid'],
+                'pending': figures['year_balance']
             }
         }
     
@@ -362,3 +737,159 @@ class CateringDashboard(models.Model):
         if previous == 0:
             return 100 if current > 0 else 0
         return round(((current - previous) / previous) * 100, 1)
+
+
+
+class CateringDashboardCache(models.Model):
+    _name = 'cater.dashboard.cache'
+    _description = 'Catering Dashboard Cache'
+    _log_access = False
+    _sql_constraints = [
+        ('unique_scope_panel', 'UNIQUE(scope_key, panel)',
+         'Only one cache entry per scope and panel is allowed!'),
+    ]
+
+    scope_key = fields.Char('Scope', required=True, readonly=True)
+    panel = fields.Char('Panel', required=True, readonly=True)
+    version = fields.Integer('Data Version', readonly=True)
+    payload = fields.Text('Payload', readonly=True)
+    computed_at = fields.Datetime('Computed At', readonly=True)
+
+    def init(self):
+        """Create the table of data versions shared by the workers.
+
+        Invalidations insert a row and the current version is the highest id.
+        Being a table, it is read in the same snapshot as the data, unlike a
+        sequence; inserts never conflict, unlike updates of a counter row.
+        """
+        super().init()
+        self.env.cr.execute("CREATE TABLE IF NOT EXISTS cater_dashboard_cache_version (id SERIAL PRIMARY KEY)")
+
+    @api.model
+    def _get_ttl(self):
+        """Cache time-to-live in seconds (system parameter cater.dashboard.cache_ttl)"""
+        return int(self.env['ir.config_parameter'].sudo().get_param('cater.dashboard.cache_ttl', 300))
+
+    @api.model
+    def _get_or_compute(self, scope_key, panel, compute):
+        """Return the cached payload for (scope_key, panel), computing it on a miss.
+
+        An entry is valid while it was computed for the current data version and
+        is younger than the TTL. The version lives in the database, so an
+        invalidation committed by one worker is seen by every other worker; it
+        is read in the transaction snapshot, so data computed before a change
+        is never stored under the version of that change.
+        """
+        cutoff = fields.Datetime.now() - timedelta(seconds=self._get_ttl())
+        self.env.cr.execute(SQL(
+            """
+            SELECT v.version, c.payload
+              FROM (SELECT COALESCE(MAX(id), 0) AS version FROM cater_dashboard_cache_version) v
+         LEFT JOIN cater_dashboard_cache c
+                ON c.scope_key = %s AND c.panel = %s
+               AND c.version = v.version AND c.computed_at >= %s
+            """,
+            scope_key, panel, cutoff,
+        ))
+        version, payload = self.env.cr.fetchone()
+        if payload:
+            return json.loads(payload)
+        
+        payload = json.dumps(compute(), default=date_utils.json_default)
+        self._store(scope_key, panel, version, payload)
+        return json.loads(payload)
+
+    @api.model
+    def _store(self, scope_key, panel, version, payload):
+        """Upsert a cache entry; concurrent refreshes of the same entry are not fatal"""
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute(SQL(
+                    """
+                    INSERT INTO cater_dashboard_cache (scope_key, panel, version, payload, computed_at)
+                         VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (scope_key, panel) DO UPDATE
+                            SET version = EXCLUDED.version,
+                                payload = EXCLUDED.payload,
+                                computed_at = EXCLUDED.computed_at
+                    """,
+                    scope_key, panel, version, payload, fields.Datetime.now(),
+                ))
+        except psycopg2.Error as e:
+            _logger.info(f"Dashboard cache entry {scope_key}/{panel} not stored: {e}")
+
+    @api.model
+    def _get_data_version(self):
+        """Version of the catering data as seen by the current transaction.
+
+        The committed version is followed by the number of invalidations
+        pending in this transaction, so that changes made before a commit
+        are told apart too.
+        """
+        self.env.cr.execute("SELECT COALESCE(MAX(id), 0) FROM cater_dashboard_cache_version")
+        version = self.env.cr.fetchone()[0]
+        return f"{version}.{self.env.cr.precommit.data.get('cater.dashboard.cache.invalidate', 0)}"
+
+    @api.model
+    def _invalidate(self):
+        """Bump the data version once, right before the current transaction commits"""
+        precommit = self.env.cr.precommit
+        if not precommit.data.get('cater.dashboard.cache.invalidate'):
+            precommit.add(self._bump_version)
+        precommit.data['cater.dashboard.cache.invalidate'] = precommit.data.get('cater.dashboard.cache.invalidate', 0) + 1
+
+    def _bump_version(self):
+        self.env.cr.precommit.data.pop('cater.dashboard.cache.invalidate', None)
+        # Versions must be committed in the order they are issued, or a
+        # snapshot could see a version without an older one: hold a lock
+        # from the insert until the commit
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(hashtext('cater_dashboard_cache_version'))")
+        self.env.cr.execute("INSERT INTO cater_dashboard_cache_version DEFAULT VALUES")
+
+    @api.autovacuum
+    def _gc_versions(self):
+        """Only the current data version is ever compared with"""
+        self.env.cr.execute("""
+            DELETE FROM cater_dashboard_cache_version
+             WHERE id < (SELECT MAX(id) FROM cater_dashboard_cache_version)
+        """)
+
+
+class CateringDashboardTiming(models.Model):
+    _name = 'cater.dashboard.timing'
+    _description = 'Catering Dashboard Panel Timing'
+    _order = 'create_date desc, id desc'
+
+    scope_key = fields.Char('Scope', required=True, readonly=True, index=True)
+    panel = fields.Char('Panel', required=True, readonly=True, index=True)
+    source = fields.Selection([
+        ('request', 'User Request'),
+        ('prewarm', 'Pre-warming'),
+    ], string='Source', default='request', readonly=True)
+    duration = fields.Float('Duration (ms)', readonly=True, digits=(16, 1), aggregator='avg')
+    query_count = fields.Integer('Queries', readonly=True, aggregator='avg')
+    row_count = fields.Integer('Rows Fetched', readonly=True, aggregator='avg')
+    error = fields.Text('Error', readonly=True)
+
+    @api.model
+    def _record(self, scope_key, panel, source, stats):
+        """Store the measured cost of one panel computation"""
+        return self.create({
+            'scope_key': scope_key,
+            'panel': panel,
+            'source': source,
+            'duration': stats.get('duration', 0.0),
+            'query_count': stats.get('query_count', 0),
+            'row_count': stats.get('row_count', 0),
+            'error': stats.get('error'),
+        })
+
+    @api.autovacuum
+    def _gc_timings(self):
+        """Keep a rolling window of timings (cater.dashboard.timing_retention_days)"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param('cater.dashboard.timing_retention_days', 30))
+        self.env.cr.execute(SQL(
+            "DELETE FROM cater_dashboard_timing WHERE create_date < %s",
+            fields.Datetime.now() - timedelta(days=days),
+        ))
+        _logger.info(f"Removed {self.env.cr.rowcount} dashboard timing records older than {days} days")
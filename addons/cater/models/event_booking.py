@@ -1,15 +1,48 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, _, Command
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import SQL
 from datetime import datetime, timedelta
 import logging
+import psycopg2
 
 _logger = logging.getLogger(__name__)
 
+# States in which a booking holds its venue for its whole time range
+VENUE_HOLDING_STATES = ('confirmed', 'in_progress')
+
+# Ghana VAT and required deposit, as fractions of the subtotal and total
+VAT_RATE = 0.15
+DEPOSIT_RATE = 0.5
+
+# Bookings computed at once from which line subtotals are summed in SQL
+TOTALS_GROUPED_THRESHOLD = 50
+
+# Stored amounts derived from the booking lines, see _recompute_totals()
+TOTAL_FIELDS = ['menu_total', 'service_total', 'subtotal', 'tax_amount', 'total_amount', 'deposit_amount', 'balance_due']
+
 class EventBooking(models.Model):
     _name = 'cater.event.booking'
     _description = 'Event Booking'
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'event_date desc, create_date desc'
+    _sql_constraints = [
+        ('venue_overlap_excl',
+         "EXCLUDE USING gist (venue WITH =, tsrange(event_date, event_end) WITH &&) "
+         "WHERE (state IN ('confirmed', 'in_progress'))",
+         'This venue is already booked for an overlapping time!'),
+    ]
+
+    def _auto_init(self):
+        # The venue overlap exclusion constraint compares venues in a GiST
+        # index, and the SQL constraints are added by _auto_init(): create the
+        # extension first. Without it the constraint is not created and
+        # _check_venue_conflict() is the only guard.
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except psycopg2.Error as e:
+            _logger.warning(f"Cannot create the btree_gist extension, venue overlaps are only checked in Python: {e}")
+        return super()._auto_init()
 
     def init(self):
         """Create database indexes for performance"""
@@ -27,6 +60,10 @@ class EventBooking(models.Model):
             CREATE INDEX IF NOT EXISTS idx_cater_booking_partner_state 
             ON cater_event_booking(partner_id, state);
         """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cater_booking_venue_date
+            ON cater_event_booking(venue, event_date);
+        """)
 
     # Basic Information
     name = fields.Char('Booking Reference', required=True, copy=False, default='New')
@@ -45,6 +82,7 @@ class EventBooking(models.Model):
     # Date and Location
     event_date = fields.Datetime('Event Date', required=True, tracking=True)
     event_duration = fields.Float('Duration (Hours)', default=4.0, required=True)
+    event_end = fields.Datetime('Event End', compute='_compute_event_end', store=True)
     venue = fields.Char('Venue', required=True)
     venue_address = fields.Text('Venue Address')
     guest_count = fields.Integer('Expected Guests', required=True, tracking=True)
@@ -81,6 +119,8 @@ class EventBooking(models.Model):
     
     # Communication
     whatsapp_sent = fields.Boolean('WhatsApp Notification Sent', default=False)
+    confirmation_pending = fields.Boolean('Confirmation Message Pending', default=False, copy=False, index=True,
+                                          help='The WhatsApp confirmation is queued for the confirmation cron')
     last_whatsapp_date = fields.Datetime('Last WhatsApp Sent')
     partner_mobile = fields.Char('Customer Mobile', related='partner_id.mobile', store=False, readonly=False)
     
@@ -105,30 +145,157 @@ class EventBooking(models.Model):
     
     @api.depends('menu_line_ids.subtotal', 'service_line_ids.subtotal')
     def _compute_totals(self):
+        # Large batches (price updates, imports) sum their lines with one
+        # grouped query per line model instead of loading every line
+        stored = self.filtered('id') if len(self) >= TOTALS_GROUPED_THRESHOLD else self.browse()
+        stored_ids = set(stored.ids)
+        menu_totals = self._get_line_totals('cater.booking.menu.line', stored)
+        service_totals = self._get_line_totals('cater.booking.service.line', stored)
         for booking in self:
-            booking.menu_total = sum(booking.menu_line_ids.mapped('subtotal'))
-            booking.service_total = sum(booking.service_line_ids.mapped('subtotal'))
+            if booking.id in stored_ids:
+                booking.menu_total = menu_totals.get(booking.id, 0.0)
+                booking.service_total = service_totals.get(booking.id, 0.0)
+            else:
+                booking.menu_total = sum(booking.menu_line_ids.mapped('subtotal'))
+                booking.service_total = sum(booking.service_line_ids.mapped('subtotal'))
             booking.subtotal = booking.menu_total + booking.service_total
-            booking.tax_amount = booking.subtotal * 0.15  # Ghana VAT 15%
+            booking.tax_amount = booking.subtotal * VAT_RATE
             booking.total_amount = booking.subtotal + booking.tax_amount
-    
-    def write(self, vals):
-        # Disable tracking for computed fields to reduce chatter noise
-        computed_fields = ['menu_total', 'service_total', 'subtotal', 'tax_amount', 'total_amount', 'deposit_amount', 'balance_due']
-        if any(field in vals for field in computed_fields) and len(vals) == len([f for f in vals if f in computed_fields]):
-            # If only computed fields are being updated, disable tracking
-            return super(EventBooking, self.with_context(mail_notrack=True)).write(vals)
-        return super().write(vals)
+
+    def _get_line_totals(self, line_model, bookings):
+        """Sum of the line subtotals of each booking, by booking id"""
+        if not bookings:
+            return {}
+        return {
+            booking.id: amount
+            for booking, amount in self.env[line_model]._read_group(
+                [('booking_id', 'in', bookings.ids)], ['booking_id'], ['subtotal:sum'])
+        }
     
     @api.depends('total_amount')
     def _compute_deposit(self):
         for booking in self:
-            booking.deposit_amount = booking.total_amount * 0.5  # 50% deposit
+            booking.deposit_amount = booking.total_amount * DEPOSIT_RATE
     
     @api.depends('total_amount', 'paid_amount')
     def _compute_balance(self):
+        # The monthly rollup and the dashboard cache are updated by the hooks
+        # of the lines and items the amounts depend on, see _mark_stats_dirty()
         for booking in self:
             booking.balance_due = booking.total_amount - booking.paid_amount
+
+    def _recompute_totals(self):
+        """Recompute the amounts of the bookings in SQL, set-based.
+
+        The line subtotals are summed per booking with grouped queries, and
+        all the TOTAL_FIELDS are written with one UPDATE, with the same
+        rounding as the compute methods. Only bookings whose amounts change
+        are written, and their payment is checked against the new total.
+        Returns the ids of the updated bookings.
+        """
+        if not self:
+            return []
+        self.env['cater.booking.menu.line'].flush_model(['booking_id', 'subtotal'])
+        self.env['cater.booking.service.line'].flush_model(['booking_id', 'subtotal'])
+        self.flush_model(TOTAL_FIELDS + ['paid_amount', 'currency_id'])
+        self.env['cater.stats.monthly']._mark_bookings_dirty(self.ids)
+        self.env.cr.execute(SQL(
+            """
+            WITH line_totals AS (
+                SELECT booking_id, SUM(subtotal) AS menu_total, 0 AS service_total
+                  FROM cater_booking_menu_line
+                 WHERE booking_id = ANY(%(ids)s)
+              GROUP BY booking_id
+             UNION ALL
+                SELECT booking_id, 0, SUM(subtotal)
+                  FROM cater_booking_service_line
+                 WHERE booking_id = ANY(%(ids)s)
+              GROUP BY booking_id
+            ), sums AS (
+                SELECT b.id, COALESCE(c.decimal_places, 2) AS digits,
+                       COALESCE(SUM(l.menu_total), 0) AS menu_total,
+                       COALESCE(SUM(l.service_total), 0) AS service_total
+                  FROM cater_event_booking b
+             LEFT JOIN line_totals l ON l.booking_id = b.id
+             LEFT JOIN res_currency c ON c.id = b.currency_id
+                 WHERE b.id = ANY(%(ids)s)
+              GROUP BY b.id, c.decimal_places
+            ), amounts AS (
+                SELECT id, digits, menu_total, service_total,
+                       menu_total + service_total AS subtotal,
+                       ROUND((menu_total + service_total) * %(vat)s::numeric, digits) AS tax_amount
+                  FROM sums
+            ), totals AS (
+                SELECT a.id, a.menu_total, a.service_total, a.subtotal, a.tax_amount,
+                       a.subtotal + a.tax_amount AS total_amount,
+                       ROUND((a.subtotal + a.tax_amount) * %(deposit)s::numeric, a.digits) AS deposit_amount,
+                       a.subtotal + a.tax_amount - COALESCE(b.paid_amount, 0) AS balance_due
+                  FROM amounts a
+                  JOIN cater_event_booking b ON b.id = a.id
+            )
+            UPDATE cater_event_booking b
+               SET menu_total = t.menu_total,
+                   service_total = t.service_total,
+                   subtotal = t.subtotal,
+                   tax_amount = t.tax_amount,
+                   total_amount = t.total_amount,
+                   deposit_amount = t.deposit_amount,
+                   balance_due = t.balance_due,
+                   write_uid = %(uid)s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM totals t
+             WHERE b.id = t.id
+               AND (b.menu_total, b.service_total, b.subtotal, b.tax_amount,
+                    b.total_amount, b.deposit_amount, b.balance_due)
+                   IS DISTINCT FROM
+                   (t.menu_total, t.service_total, t.subtotal, t.tax_amount,
+                    t.total_amount, t.deposit_amount, t.balance_due)
+         RETURNING b.id
+            """,
+            ids=self.ids, vat=VAT_RATE, deposit=DEPOSIT_RATE, uid=self.env.uid,
+        ))
+        updated_ids = [row[0] for row in self.env.cr.fetchall()]
+        if updated_ids:
+            self.invalidate_model(TOTAL_FIELDS + ['write_uid', 'write_date'])
+            # The UPDATE bypasses the constraints depending on the amounts
+            self.browse(updated_ids)._check_payment_amount()
+            self.env['cater.dashboard'].clear_dashboard_cache()
+        return updated_ids
+
+    @api.model
+    def _recompute_all_totals(self, chunk_size=5000, auto_commit=True):
+        """Maintenance command recomputing the amounts of every booking.
+
+        Bookings are processed by increasing id in chunks of ``chunk_size``.
+        The last processed id is kept in the ``cater.recompute_totals_last_id``
+        parameter and committed with each chunk, so an interrupted run resumes
+        where it stopped; the parameter is removed once all bookings are done.
+        Returns the number of updated bookings.
+
+        Run it from a shell: ``env['cater.event.booking']._recompute_all_totals()``
+        """
+        Param = self.env['ir.config_parameter'].sudo()
+        last_id = int(Param.get_param('cater.recompute_totals_last_id', 0))
+        if last_id:
+            _logger.info(f"Resuming the booking totals recompute after booking {last_id}")
+        updated_count = 0
+        while True:
+            bookings = self.with_context(active_test=False).search(
+                [('id', '>', last_id)], order='id', limit=chunk_size)
+            if not bookings:
+                break
+            updated_count += len(bookings._recompute_totals())
+            last_id = bookings[-1].id
+            Param.set_param('cater.recompute_totals_last_id', last_id)
+            if auto_commit:
+                self.env.cr.commit()
+            # Keep memory flat on large tables
+            self.env.invalidate_all()
+        Param.set_param('cater.recompute_totals_last_id', False)
+        if auto_commit:
+            self.env.cr.commit()
+        _logger.info(f"Recomputed booking totals: {updated_count} bookings updated")
+        return updated_count
     
     @api.constrains('event_date')
     def _check_event_date(self):
@@ -139,20 +306,120 @@ class EventBooking(models.Model):
             if booking.event_date <= fields.Datetime.now():
                 raise ValidationError("Event date must be in the future.")
 
-    @api.constrains('event_date', 'venue')
-    def _check_venue_conflict(self):
+    @api.depends('event_date', 'event_duration')
+    def _compute_event_end(self):
         for booking in self:
-            if not booking.event_date or not booking.venue:
-                continue
-            # Find overlapping bookings at the same venue (excluding self)
-            overlap = self.search([
-                ('id', '!=', booking.id),
-                ('venue', '=', booking.venue),
-                ('event_date', '=', booking.event_date),
-                ('state', 'in', ['confirmed', 'in_progress'])
-            ])
-            if overlap:
-                raise ValidationError(f"Venue '{booking.venue}' is already booked for {booking.event_date}.")
+            booking.event_end = booking.event_date and booking.event_date + timedelta(hours=booking.event_duration)
+
+    @api.constrains('event_date', 'event_duration', 'venue', 'state')
+    def _check_venue_conflict(self):
+        """Reject confirmed or in-progress bookings overlapping another one at the same venue.
+
+        Only bookings holding their venue are checked, so drafts can still be
+        edited or cancelled. One query checks all the records; it matches the
+        exclusion constraint and the venue/date index, which also serve it.
+        """
+        self.flush_model(['venue', 'event_date', 'event_end', 'state'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT b.venue, o.event_date, o.event_end
+              FROM cater_event_booking b
+              JOIN cater_event_booking o
+                ON o.venue = b.venue
+               AND o.id != b.id
+               AND o.state IN %s
+               AND o.event_date < b.event_end
+               AND tsrange(o.event_date, o.event_end) && tsrange(b.event_date, b.event_end)
+             WHERE b.id IN %s
+               AND b.state IN %s
+             LIMIT 1
+            """,
+            VENUE_HOLDING_STATES, tuple(self.ids), VENUE_HOLDING_STATES,
+        ))
+        conflict = self.env.cr.fetchone()
+        if conflict:
+            venue, start, end = conflict
+            raise ValidationError(f"Venue '{venue}' is already booked from {start} to {end}.")
+
+    @api.model
+    def get_venue_availability(self, venues, date_from, date_to, weekdays=None, min_hours=0.0,
+                               day_start=8.0, day_end=23.0):
+        """Free time windows per venue between two dates (inclusive).
+
+        Each day is open from day_start to day_end (hours). Windows not taken
+        by a confirmed or in-progress booking and lasting at least min_hours
+        are returned, optionally only on the given weekdays (0 = Monday,
+        6 = Sunday, as date.weekday()). All venues and days are answered by one query: the
+        bookings overlapping each opening are clipped to it and the gaps
+        between them found with a window function.
+
+        :return: {venue: [{'date', 'start', 'end', 'hours'}]}, dates in UTC
+        """
+        self.check_access('read')
+        if isinstance(venues, str):
+            venues = [venues]
+        date_from, date_to = fields.Date.to_date(date_from), fields.Date.to_date(date_to)
+        if not venues or date_from > date_to or not 0 <= day_start < day_end <= 24:
+            return {}
+        self.flush_model(['venue', 'event_date', 'event_end', 'state'])
+        self.env.cr.execute(SQL(
+            """
+            WITH openings AS (
+                SELECT venue, day::date AS day,
+                       day + make_interval(secs => %(day_start)s * 3600) AS open_at,
+                       day + make_interval(secs => %(day_end)s * 3600) AS close_at
+                  FROM unnest(%(venues)s::varchar[]) AS venue,
+                       generate_series(%(date_from)s::timestamp, %(date_to)s::timestamp, interval '1 day') AS day
+                 WHERE %(weekdays)s::int[] IS NULL OR EXTRACT(ISODOW FROM day)::int - 1 = ANY(%(weekdays)s::int[])
+            ), busy AS (
+                SELECT o.venue, o.day, o.open_at, o.close_at,
+                       GREATEST(b.event_date, o.open_at) AS busy_start,
+                       LEAST(b.event_end, o.close_at) AS busy_end
+                  FROM openings o
+                  JOIN cater_event_booking b
+                    ON b.venue = o.venue
+                   AND b.state IN %(states)s
+                   AND tsrange(b.event_date, b.event_end) && tsrange(o.open_at, o.close_at)
+            ), gaps AS (
+                -- before each booking: from the end of the earlier ones (or the opening)
+                SELECT venue, day,
+                       COALESCE(MAX(busy_end) OVER (
+                           PARTITION BY venue, day ORDER BY busy_start, busy_end
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ), open_at) AS free_start,
+                       busy_start AS free_end
+                  FROM busy
+                 UNION ALL
+                -- after the last booking of the day
+                SELECT venue, day, MAX(busy_end), close_at
+                  FROM busy
+              GROUP BY venue, day, close_at
+                 UNION ALL
+                -- days without bookings
+                SELECT venue, day, open_at, close_at
+                  FROM openings o
+                 WHERE NOT EXISTS (SELECT 1 FROM busy WHERE busy.venue = o.venue AND busy.day = o.day)
+            )
+            SELECT venue, day, free_start, free_end
+              FROM gaps
+             WHERE free_end > free_start
+               AND free_end - free_start >= make_interval(secs => %(min_hours)s * 3600)
+          ORDER BY venue, free_start
+            """,
+            venues=list(venues), date_from=date_from, date_to=date_to,
+            weekdays=list(weekdays) if weekdays else None,
+            day_start=day_start, day_end=day_end, min_hours=min_hours,
+            states=VENUE_HOLDING_STATES,
+        ))
+        availability = {venue: [] for venue in venues}
+        for venue, day, start, end in self.env.cr.fetchall():
+            availability[venue].append({
+                'date': fields.Date.to_string(day),
+                'start': fields.Datetime.to_string(start),
+                'end': fields.Datetime.to_string(end),
+                'hours': round((end - start).total_seconds() / 3600, 2),
+            })
+        return availability
     
     @api.constrains('guest_count')
     def _check_guest_count(self):
@@ -192,7 +459,12 @@ class EventBooking(models.Model):
                 if not partner.is_catering_customer:
                     partner.is_catering_customer = True
         
-        return super().create(vals_list)
+        bookings = super().create(vals_list)
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        if self.env.context.get('import_file'):
+            # Bulk imports invalidate every panel; recompute them before users do
+            self.env['cater.dashboard']._schedule_prewarm()
+        return bookings
     
     def write(self, vals):
         # Prevent modification of confirmed bookings
@@ -201,37 +473,69 @@ class EventBooking(models.Model):
             if any(field in vals for field in restricted_fields) and not self.env.user.has_group('cater.catering_manager_group'):
                 raise ValidationError("Only managers can modify confirmed bookings.")
         
-        # Clear dashboard cache when booking data changes
-        if any(field in vals for field in ['state', 'total_amount', 'create_date']):
-            try:
-                self.env['cater.dashboard'].clear_dashboard_cache()
-            except Exception as e:
-                _logger.warning(f"Failed to clear dashboard cache: {e}")
+        # Clear dashboard cache: its panels and the cached reports show
+        # booking data (recomputed amounts are covered by _compute_balance)
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        
+        # Keep the monthly statistics rollup in sync with its grouping keys
+        if any(field in vals for field in ['state', 'event_type', 'guest_count', 'paid_amount']):
+            self.env['cater.stats.monthly']._mark_bookings_dirty(self.ids)
         
         # Disable tracking for computed fields to reduce chatter noise
-        computed_fields = ['menu_total', 'service_total', 'subtotal', 'tax_amount', 'total_amount', 'deposit_amount', 'balance_due']
+        computed_fields = TOTAL_FIELDS
         if any(field in vals for field in computed_fields) and len(vals) == len([f for f in vals if f in computed_fields]):
             # If only computed fields are being updated, disable tracking
             return super(EventBooking, self.with_context(mail_notrack=True)).write(vals)
         
-        return super().write(vals)
+        previous_states = {}
+        if vals.get('state') == 'confirmed':
+            previous_states = {booking.id: booking.state for booking in self if booking.state != 'confirmed'}
+        
+        result = super().write(vals)
+        
+        # Push the confirmations to open dashboards
+        if previous_states:
+            self.env['cater.dashboard']._notify_bookings_confirmed(self.browse(list(previous_states)), previous_states)
+        return result
+    
+    def _create(self, data_list):
+        records = super()._create(data_list)
+        # New bookings count from nothing in the monthly rollup; this runs
+        # before any compute or constraint of the new records
+        self.env['cater.stats.monthly']._mark_bookings_dirty(records.ids, created=True)
+        return records
+
+    def unlink(self):
+        self.env['cater.stats.monthly']._mark_bookings_dirty(self.ids)
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().unlink()
     
     def action_confirm(self):
-        """Confirm the booking and create sale order"""
-        if not self.menu_line_ids:
-            raise UserError("Please add at least one menu item before confirming.")
+        """Confirm the draft bookings and create their sale orders.
+
+        Works on any number of bookings: sale orders are created in one batch,
+        the chatter messages are logged together and the WhatsApp
+        confirmations are queued, one per booking, for the confirmation cron.
+        """
+        bookings = self.filtered(lambda booking: booking.state == 'draft')
+        without_menu = bookings.filtered(lambda booking: not booking.menu_line_ids)
+        if without_menu:
+            raise UserError(
+                "Please add at least one menu item before confirming: "
+                + ", ".join(without_menu.mapped('name'))
+            )
+        if not bookings:
+            return
         
-        self.state = 'confirmed'
-        self._create_sale_order()
-        self._send_whatsapp_confirmation()
+        bookings.write({'state': 'confirmed', 'confirmation_pending': True})
+        bookings._create_sale_orders()
         
         # Log activity
-        self.message_post(
-            body=f"Booking confirmed for {self.event_name} on {self.event_date.strftime('%Y-%m-%d %H:%M')}",
-            message_type='notification'
-        )
-        self._send_whatsapp_confirmation()
-        self.message_post(body="Booking confirmed", message_type='notification')
+        bookings._message_log_batch({
+            booking.id: f"Booking confirmed for {booking.event_name} on {booking.event_date.strftime('%Y-%m-%d %H:%M')}"
+            for booking in bookings
+        })
+        self.env.ref('cater.catering_confirmation_cron').sudo()._trigger()
     
     def action_start_event(self):
         """Mark event as in progress"""
@@ -249,50 +553,36 @@ class EventBooking(models.Model):
         self.state = 'cancelled'
         self.message_post(body="Booking cancelled", message_type='notification')
     
-    def _create_sale_order(self):
-        """Create sale order from booking"""
-        if self.sale_order_id:
-            return
-            
-        order_lines = []
+    def _create_sale_orders(self):
+        """Create the sale orders of the bookings without one, in one batch"""
+        bookings = self.filtered(lambda booking: not booking.sale_order_id)
+        if not bookings:
+            return self.env['sale.order']
         
-        # Add menu items
-        for line in self.menu_line_ids:
-            order_lines.append((0, 0, {
-                'product_id': self._get_or_create_product(line.menu_item_id.name, line.price_unit).id,
+        # Products of the menu items and services, created the first time they are sold
+        menu_items, services = bookings.menu_line_ids.menu_item_id, bookings.service_line_ids.service_id
+        products = dict(zip(menu_items, menu_items._get_products()))
+        products.update(zip(services, services._get_products()))
+        lines = [(line, products[line.menu_item_id]) for line in bookings.menu_line_ids] + \
+            [(line, products[line.service_id]) for line in bookings.service_line_ids]
+        order_lines = {booking.id: [] for booking in bookings}
+        for line, product in lines:
+            order_lines[line.booking_id.id].append(Command.create({
+                'product_id': product.id,
                 'product_uom_qty': line.quantity,
                 'price_unit': line.price_unit,
             }))
         
-        # Add services
-        for line in self.service_line_ids:
-            order_lines.append((0, 0, {
-                'product_id': self._get_or_create_product(line.service_id.name, line.price_unit).id,
-                'product_uom_qty': line.quantity,
-                'price_unit': line.price_unit,
-            }))
-        
-        sale_order = self.env['sale.order'].create({
-            'partner_id': self.partner_id.id,
+        sale_orders = self.env['sale.order'].create([{
+            'partner_id': booking.partner_id.id,
             'date_order': fields.Datetime.now(),
-            'order_line': order_lines,
-            'note': f"Event: {self.event_name}\nDate: {self.event_date}\nGuests: {self.guest_count}"
-        })
+            'order_line': order_lines[booking.id],
+            'note': f"Event: {booking.event_name}\nDate: {booking.event_date}\nGuests: {booking.guest_count}"
+        } for booking in bookings])
         
-        self.sale_order_id = sale_order.id
-        return sale_order
-    
-    def _get_or_create_product(self, name, price):
-        """Get or create product for sale order"""
-        product = self.env['product.product'].search([('name', '=', name)], limit=1)
-        if not product:
-            product = self.env['product.product'].create({
-                'name': name,
-                'type': 'service',
-                'list_price': price,
-                'categ_id': self.env.ref('product.product_category_all').id,
-            })
-        return product
+        for booking, sale_order in zip(bookings, sale_orders):
+            booking.sale_order_id = sale_order
+        return sale_orders
     
     def _send_whatsapp_confirmation(self):
         """Send WhatsApp confirmation message if opted in"""
@@ -429,6 +719,23 @@ Your feedback helps us serve you better! 💬
             
             offset += batch_size
     
+    @api.model
+    def _cron_send_confirmations(self, limit=100, auto_commit=True):
+        """Cron job sending the queued WhatsApp booking confirmations, oldest first.
+
+        The queue flag is cleared and committed with each message, so a
+        booking is never confirmed twice, even if the run is interrupted.
+        """
+        bookings = self.search([('confirmation_pending', '=', True)], order='id', limit=limit)
+        for booking in bookings:
+            booking.confirmation_pending = False
+            booking._send_whatsapp_confirmation()
+            if auto_commit:
+                self.env.cr.commit()
+        if auto_commit and len(bookings) == limit:
+            # More confirmations may be waiting: run again right away
+            self.env.ref('cater.catering_confirmation_cron').sudo()._trigger()
+    
     @api.model
     def _cron_send_feedback_requests(self):
         """Cron job to send feedback requests for completed events - Optimized"""
@@ -772,7 +1079,7 @@ _Thank you for choosing our catering services._
             response_rate = (len(feedback_received) / len(feedback_requested)) * 100
         
         # Get feedback statistics
-        feedback_records = self.env['cater.feedback'].search([
+        stats = self.env['cater.feedback.stats'].compute([
             ('booking_id', 'in', completed_bookings.ids)
         ])
         
@@ -785,19 +1092,21 @@ _Thank you for choosing our catering services._
             'pending_feedback': len(feedback_requested) - len(feedback_received),
         }
         
-        if feedback_records:
-            ratings = [int(f.rating) for f in feedback_records if f.rating]
-            if ratings:
-                analytics.update({
-                    'average_rating': round(sum(ratings) / len(ratings), 2),
-                    'five_star_count': len([r for r in ratings if r == 5]),
-                    'four_star_count': len([r for r in ratings if r == 4]),
-                    'three_star_count': len([r for r in ratings if r == 3]),
-                    'two_star_count': len([r for r in ratings if r == 2]),
-                    'one_star_count': len([r for r in ratings if r == 1]),
-                    'positive_feedback_rate': round((len([r for r in ratings if r >= 4]) / len(ratings)) * 100, 1),
-                    'needs_followup': len([r for r in ratings if r < 4]),
-                })
+        if stats['rated_count']:
+            distribution = stats['distribution']
+            analytics.update({
+                'average_rating': stats['avg_rating'],
+                'rating_std_dev': stats['std_rating'],
+                'five_star_count': distribution['5'],
+                'four_star_count': distribution['4'],
+                'three_star_count': distribution['3'],
+                'two_star_count': distribution['2'],
+                'one_star_count': distribution['1'],
+                'positive_feedback_rate': round(stats['positive_count'] / stats['rated_count'] * 100, 1),
+                'needs_followup': stats['nps']['detractors'],
+                'nps_score': stats['nps']['score'],
+                'sub_scores': stats['sub_scores'],
+            })
         
         return analytics
 
@@ -828,12 +1137,11 @@ _Thank you for choosing our catering services._
         confirmation_rate = (len(feedback_confirmed) / len(feedback_received) * 100) if feedback_received else 0
         
         # Get feedback details
-        feedback_records = self.env['cater.feedback'].search([
-            ('booking_id', 'in', completed_bookings.ids)
-        ])
+        feedback_domain = [('booking_id', 'in', completed_bookings.ids)]
+        stats = self.env['cater.feedback.stats'].compute(feedback_domain)
         
         # Analyze response patterns
-        whatsapp_responses = feedback_records.filtered(lambda f: f.source == 'whatsapp')
+        whatsapp_responses = self.env['cater.feedback'].search(feedback_domain + [('source', '=', 'whatsapp')])
         avg_response_time = 0
         
         if whatsapp_responses:
@@ -846,9 +1154,7 @@ _Thank you for choosing our catering services._
             avg_response_time = sum(response_times) / len(response_times) if response_times else 0
         
         # Rating distribution
-        rating_dist = {}
-        for i in range(1, 6):
-            rating_dist[f'{i}_star'] = len(feedback_records.filtered(lambda f: f.rating == str(i)))
+        rating_dist = {f'{star}_star': count for star, count in stats['distribution'].items()}
         
         return {
             'period_days': days,
@@ -860,11 +1166,11 @@ _Thank you for choosing our catering services._
             'response_rate': round(response_rate, 1),
             'confirmation_rate': round(confirmation_rate, 1),
             'avg_response_time_hours': round(avg_response_time, 2),
-            'total_feedback': len(feedback_records),
+            'total_feedback': stats['total_feedback'],
             'whatsapp_feedback': len(whatsapp_responses),
             'rating_distribution': rating_dist,
-            'high_ratings_count': len(feedback_records.filtered(lambda f: int(f.rating) >= 4)),
-            'needs_followup': len(feedback_records.filtered(lambda f: int(f.rating) < 4)),
+            'high_ratings_count': stats['positive_count'],
+            'needs_followup': stats['nps']['detractors'],
         }
 
 
@@ -884,6 +1190,26 @@ class BookingMenuLine(models.Model):
     def _compute_subtotal(self):
         for line in self:
             line.subtotal = line.quantity * line.price_unit
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['cater.stats.monthly']._mark_bookings_dirty([vals.get('booking_id') for vals in vals_list])
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if any(field in vals for field in ['booking_id', 'menu_item_id', 'quantity']):
+            self._mark_stats_dirty(vals.get('booking_id'))
+        return super().write(vals)
+
+    def unlink(self):
+        self._mark_stats_dirty()
+        return super().unlink()
+
+    def _mark_stats_dirty(self, booking_id=None):
+        """Record the rollup contribution of the bookings before their amounts change"""
+        self.env['cater.stats.monthly']._mark_bookings_dirty(self.booking_id.ids + [booking_id])
+        self.env['cater.dashboard'].clear_dashboard_cache()
     
     @api.constrains('quantity')
     def _check_quantity(self):
@@ -909,3 +1235,23 @@ class BookingServiceLine(models.Model):
     def _compute_subtotal(self):
         for line in self:
             line.subtotal = line.quantity * line.price_unit
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['cater.stats.monthly']._mark_bookings_dirty([vals.get('booking_id') for vals in vals_list])
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if any(field in vals for field in ['booking_id', 'service_id', 'quantity']):
+            self._mark_stats_dirty(vals.get('booking_id'))
+        return super().write(vals)
+
+    def unlink(self):
+        self._mark_stats_dirty()
+        return super().unlink()
+
+    def _mark_stats_dirty(self, booking_id=None):
+        """Record the rollup contribution of the bookings before their amounts change"""
+        self.env['cater.stats.monthly']._mark_bookings_dirty(self.booking_id.ids + [booking_id])
+        self.env['cater.dashboard'].clear_dashboard_cache()
@@ -101,6 +101,30 @@ class CateringFeedback(models.Model):
             if record.feedback_date < record.booking_id.event_date:
                 raise ValidationError(_("Feedback cannot be provided before the event date."))
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['cater.stats.monthly']._mark_bookings_dirty([vals.get('booking_id') for vals in vals_list])
+        feedback = super().create(vals_list)
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        self.env['cater.dashboard']._notify_feedback_received(feedback)
+        return feedback
+    
+    def write(self, vals):
+        if 'rating' in vals or 'booking_id' in vals:
+            self._mark_stats_dirty(vals.get('booking_id'))
+        result = super().write(vals)
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        return result
+    
+    def unlink(self):
+        self._mark_stats_dirty()
+        self.env['cater.dashboard'].clear_dashboard_cache()
+        return super().unlink()
+    
+    def _mark_stats_dirty(self, booking_id=None):
+        """Record the monthly rollup buckets of the bookings before a feedback change"""
+        self.env['cater.stats.monthly']._mark_bookings_dirty(self.booking_id.ids + [booking_id])
+    
     @api.model
     def create_from_whatsapp(self, booking_id, rating, comments):
         """Create feedback from WhatsApp response with validation"""
@@ -164,30 +188,13 @@ class CateringFeedback(models.Model):
         if date_to:
             domain.append(('create_date', '<=', date_to))
         
-        feedback_records = self.search(domain)
-        
-        if not feedback_records:
-            return {
-                'avg_rating': 0,
-                'total_feedback': 0,
-                'positive_rate': 0,
-                'recommendation_rate': 0
-            }
-        
-        ratings = [int(f.rating) for f in feedback_records if f.rating]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
-        
-        positive_count = len(feedback_records.filtered('is_positive'))
-        positive_rate = (positive_count / len(feedback_records)) * 100
-        
-        recommendations = len(feedback_records.filtered('would_recommend'))
-        recommendation_rate = (recommendations / len(feedback_records)) * 100
-        
+        stats = self.env['cater.feedback.stats'].compute(domain)
         return {
-            'avg_rating': round(avg_rating, 2),
-            'total_feedback': len(feedback_records),
-            'positive_rate': round(positive_rate, 1),
-            'recommendation_rate': round(recommendation_rate, 1)
+            'avg_rating': stats['avg_rating'],
+            'total_feedback': stats['total_feedback'],
+            'positive_rate': stats['positive_rate'],
+            'recommendation_rate': stats['recommendation_rate'],
+            'nps_score': stats['nps']['score'],
         }
 
     @api.model
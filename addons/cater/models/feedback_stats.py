@@ -0,0 +1,111 @@
+from odoo import models, api
+from odoo.tools import SQL
+import numpy as np
+
+# Columns fetched per feedback, in matrix column order
+SCORE_FIELDS = ['rating', 'food_quality', 'service_quality', 'presentation', 'timeliness']
+SUB_SCORE_FIELDS = SCORE_FIELDS[1:]
+PERCENTILES = [25, 50, 75, 90]
+
+
+def _round(value, digits=2):
+    """Round a NumPy scalar for JSON payloads; undefined values (NaN) become None"""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+class CateringFeedbackStats(models.AbstractModel):
+    _name = 'cater.feedback.stats'
+    _description = 'Feedback Statistics'
+
+    @api.model
+    def _fetch_scores(self, domain):
+        """Fetch the scores of the matching feedback in one query.
+
+        Returns a float matrix with one row per feedback and one column per
+        SCORE_FIELDS entry (NaN where unset), and the would_recommend flags.
+        """
+        Feedback = self.env['cater.feedback']
+        Feedback.flush_model(SCORE_FIELDS + ['would_recommend'])
+        query = Feedback._search(domain)
+        self.env.cr.execute(query.select(
+            SQL("NULLIF(%s, '')::integer", SQL.identifier(query.table, 'rating')),
+            *(SQL("NULLIF(%s, 0)", SQL.identifier(query.table, field)) for field in SUB_SCORE_FIELDS),
+            SQL("COALESCE(%s, FALSE)", SQL.identifier(query.table, 'would_recommend')),
+        ))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return np.empty((0, len(SCORE_FIELDS))), np.empty(0, dtype=bool)
+        data = np.array(rows, dtype=object)
+        scores = data[:, :len(SCORE_FIELDS)].astype(float)
+        return scores, data[:, -1].astype(bool)
+
+    @api.model
+    def compute(self, domain):
+        """Statistics of the feedback matching ``domain``.
+
+        Ratings are summarized with their mean, spread, percentiles, star
+        distribution and NPS-style buckets (5 stars promote, 4 is passive,
+        1-3 detract); sub-scores with their mean and spread, and with their
+        correlation to each other and to the overall rating.
+        """
+        scores, recommend = self._fetch_scores(domain)
+        total = len(scores)
+        ratings = scores[:, 0]
+        rated = ratings[~np.isnan(ratings)]
+
+        stats = {
+            'total_feedback': total,
+            'rated_count': len(rated),
+            'avg_rating': 0,
+            'std_rating': 0,
+            'percentiles': dict.fromkeys(PERCENTILES, 0),
+            'distribution': dict.fromkeys(['1', '2', '3', '4', '5'], 0),
+            'positive_count': 0,
+            'positive_rate': 0,
+            'recommendation_rate': 0,
+            'nps': {'promoters': 0, 'passives': 0, 'detractors': 0, 'score': 0},
+            'sub_scores': {field: {'mean': 0, 'std': 0} for field in SUB_SCORE_FIELDS},
+            'correlations': {},
+        }
+        if not total:
+            return stats
+
+        stats['recommendation_rate'] = _round(np.count_nonzero(recommend) / total * 100, 1)
+        if len(rated):
+            counts = np.bincount(rated.astype(int), minlength=6)
+            promoters, passives, detractors = counts[5], counts[4], counts[1:4].sum()
+            stats.update({
+                'avg_rating': _round(rated.mean()),
+                'std_rating': _round(rated.std()),
+                'percentiles': dict(zip(PERCENTILES, map(_round, np.percentile(rated, PERCENTILES)))),
+                'distribution': {str(star): int(counts[star]) for star in range(1, 6)},
+                'positive_count': int(promoters + passives),
+                'positive_rate': _round((promoters + passives) / total * 100, 1),
+                'nps': {
+                    'promoters': int(promoters),
+                    'passives': int(passives),
+                    'detractors': int(detractors),
+                    'score': _round((promoters - detractors) / len(rated) * 100, 1),
+                },
+            })
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sub_scores = scores[:, 1:]
+            if not np.isnan(sub_scores).all():
+                means = np.nanmean(sub_scores, axis=0)
+                stds = np.nanstd(sub_scores, axis=0)
+                stats['sub_scores'] = {
+                    field: {'mean': _round(mean) or 0, 'std': _round(std) or 0}
+                    for field, mean, std in zip(SUB_SCORE_FIELDS, means, stds)
+                }
+            # Pearson correlations over the feedback with every score set;
+            # undefined (constant or too few rows) correlations are None
+            complete = scores[~np.isnan(scores).any(axis=1)]
+            if len(complete) > 1:
+                matrix = np.corrcoef(complete, rowvar=False)
+                stats['correlations'] = {
+                    field: {other: _round(matrix[i, j]) for j, other in enumerate(SCORE_FIELDS) if j != i}
+                    for i, field in enumerate(SCORE_FIELDS)
+                }
+        return stats
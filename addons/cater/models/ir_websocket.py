@@ -0,0 +1,13 @@
+from odoo import models
+
+from .dashboard import DASHBOARD_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # Dashboard deltas carry business figures: only catering staff may listen
+        if DASHBOARD_CHANNEL in channels and not self.env.user.has_group('cater.catering_staff_group'):
+            channels = [channel for channel in channels if channel != DASHBOARD_CHANNEL]
+        return super()._build_bus_channel_list(channels)
@@ -15,7 +15,9 @@ class MenuCategory(models.Model):
 class MenuItem(models.Model):
     _name = 'cater.menu.item'
     _description = 'Menu Item'
+    _inherit = ['cater.product.mixin']
     _order = 'category_id, name'
+    _product_sync_fields = ['name', 'price_per_person']
 
     name = fields.Char('Item Name', required=True)
     category_id = fields.Many2one('cater.menu.category', 'Category', required=True)
@@ -34,6 +36,15 @@ class MenuItem(models.Model):
     available_from = fields.Datetime('Available From')
     available_to = fields.Datetime('Available To')
     
+    def _get_product_values(self):
+        return dict(super()._get_product_values(), list_price=self.price_per_person)
+
+    def write(self, vals):
+        if 'price_per_person' in vals:
+            # The line prices, hence the booking amounts, follow the item price
+            self.env['cater.booking.menu.line'].sudo().search([('menu_item_id', 'in', self.ids)])._mark_stats_dirty()
+        return super().write(vals)
+
     @api.constrains('price_per_person')
     def _check_price(self):
         for record in self:
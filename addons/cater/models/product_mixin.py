@@ -0,0 +1,74 @@
+from odoo import models, fields
+
+
+class CateringProductMixin(models.AbstractModel):
+    _name = 'cater.product.mixin'
+    _description = 'Catering Sellable Item'
+
+    # Fields of the item mirrored on its product, see _get_product_values()
+    _product_sync_fields = ['name']
+
+    product_id = fields.Many2one('product.product', 'Product', readonly=True, copy=False,
+                                 ondelete='restrict', index='btree_not_null',
+                                 help='Product used on the sale orders, created the first time the item is sold')
+
+    def _get_product_values(self):
+        """Values of the product of the item"""
+        self.ensure_one()
+        return {
+            'name': self.name,
+            'type': 'service',
+            'sale_ok': True,
+            'purchase_ok': False,
+        }
+
+    def _get_products(self):
+        """Product of each item, in the same order, created if missing"""
+        items = self.sudo()
+        missing = items.filtered(lambda item: not item.product_id)
+        if missing:
+            missing._create_products()
+        return self.env['product.product'].browse([item.product_id.id for item in items])
+
+    def _create_products(self):
+        """Link the items to a product, created unless one of the same name is free.
+
+        Databases upgraded from the lookup by name have products named after
+        the items, on their former sale orders: adopt them rather than
+        creating duplicates, unless another item already uses them.
+        """
+        Product = self.env['product.product'].sudo()
+        products = {}
+        for product in Product.search([('name', 'in', self.mapped('name'))], order='id desc'):
+            products[product.name] = product
+        candidate_ids = [product.id for product in products.values()]
+        used = set()
+        for model in self.pool[self._name]._inherit_children:
+            Item = self.env[model].sudo().with_context(active_test=False)
+            if not Item._abstract:
+                used.update(Item.search([('product_id', 'in', candidate_ids)]).product_id.ids)
+        missing = self.sudo().browse()
+        for record in self.sudo():
+            product = products.get(record.name)
+            if product and product.id not in used:
+                record.product_id = product
+                used.add(product.id)
+            else:
+                missing |= record
+        created = Product.create([
+            dict(record._get_product_values(), categ_id=self.env.ref('product.product_category_all').id)
+            for record in missing
+        ])
+        for record, product in zip(missing, created):
+            record.product_id = product
+
+    def write(self, vals):
+        result = super().write(vals)
+        if any(field in vals for field in self._product_sync_fields):
+            for record in self.filtered('product_id'):
+                # Only the mirrored values: the type and flags may be edited on the product
+                values = record._get_product_values()
+                record.product_id.sudo().write({
+                    field: values[field] for field in ('name', 'list_price') if field in values
+                })
+        return result
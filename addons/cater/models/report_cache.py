@@ -0,0 +1,119 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+import hashlib
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+
+class CateringReportCache(models.Model):
+    _name = 'cater.report.cache'
+    _description = 'Catering Report Cache'
+    _order = 'last_used desc'
+    _sql_constraints = [
+        ('unique_key', 'UNIQUE(key)', 'Only one cached report per set of parameters is allowed!'),
+    ]
+
+    key = fields.Char('Key', required=True, readonly=True)
+    report_type = fields.Char('Report Type', readonly=True)
+    watermark = fields.Char('Data Watermark', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', 'Report File', required=True, readonly=True, ondelete='cascade')
+    file_size = fields.Integer('Size', readonly=True)
+    hit_count = fields.Integer('Hits', readonly=True)
+    last_used = fields.Datetime('Last Used', readonly=True, index=True)
+
+    @api.model
+    def _get_key(self, wizard):
+        """Cache key of the wizard parameters, within the user's access scope"""
+        parameters = {
+            'scope': self.env['cater.dashboard']._get_cache_scope(),
+            'report_type': wizard.report_type,
+            'date_from': str(wizard.date_from),
+            'date_to': str(wizard.date_to),
+            'partner_ids': sorted(wizard.partner_ids.ids),
+            'event_type': wizard.event_type or False,
+            'export_format': wizard.export_format,
+            'detail_rows': wizard.detail_rows,
+            'batch_mode': wizard.batch_mode,
+        }
+        return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+    @api.model
+    def _get_watermark(self):
+        """Version of the data the reports are generated from.
+
+        Every change to bookings, feedback and catering invoices bumps the
+        version (see cater.dashboard.cache), including changes that move no
+        write date, such as deletions or recomputed amounts. It must be taken
+        before the report is generated, so that changes committed meanwhile
+        invalidate the entry.
+        """
+        return self.env['cater.dashboard.cache']._get_data_version()
+
+    @api.model
+    def _get(self, wizard, watermark):
+        """Cached report file for the wizard parameters, if the data did not change since"""
+        entry = self.sudo().search([('key', '=', self._get_key(wizard))], limit=1)
+        if not entry:
+            return self.env['ir.attachment']
+        if entry.watermark != watermark:
+            entry.unlink()
+            return self.env['ir.attachment']
+        # Plain SQL: a hit must not rewrite the entry through the ORM
+        self.env.cr.execute(SQL(
+            "UPDATE cater_report_cache SET hit_count = hit_count + 1, last_used = %s WHERE id = %s",
+            fields.Datetime.now(), entry.id,
+        ))
+        entry.invalidate_recordset(['hit_count', 'last_used'])
+        return entry.attachment_id
+
+    @api.model
+    def _put(self, wizard, attachment, watermark):
+        """Keep the report file generated from the data at ``watermark`` and return it"""
+        key = self._get_key(wizard)
+        self.sudo().search([('key', '=', key)]).unlink()
+        entry = self.sudo().create({
+            'key': key,
+            'report_type': wizard.report_type,
+            'watermark': watermark,
+            'attachment_id': attachment.id,
+            'file_size': attachment.file_size,
+            'last_used': fields.Datetime.now(),
+        })
+        if (attachment.res_model, attachment.res_id) == (wizard._name, wizard.id):
+            attachment.sudo().write({'res_model': self._name, 'res_id': entry.id})
+        else:
+            # A file reused from another export: the entry gets its own copy
+            attachment = attachment.sudo().copy({'res_model': self._name, 'res_id': entry.id})
+            entry.attachment_id = attachment
+        self._evict()
+        return attachment
+
+    @api.model
+    def _evict(self):
+        """Drop the least recently used entries beyond the configured count and size.
+
+        Limits: cater.report_cache.max_entries (default 200) and
+        cater.report_cache.max_size_mb (default 500).
+        """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        max_entries = int(get_param('cater.report_cache.max_entries', 200))
+        max_size = int(get_param('cater.report_cache.max_size_mb', 500)) * 1024 * 1024
+        self.env.cr.execute(SQL(
+            """
+            SELECT id
+              FROM (SELECT id,
+                           ROW_NUMBER() OVER w AS position,
+                           SUM(file_size) OVER w AS total_size
+                      FROM cater_report_cache
+                    WINDOW w AS (ORDER BY last_used DESC, id DESC)) AS entries
+             WHERE position > %s OR total_size > %s
+            """,
+            max_entries, max_size,
+        ))
+        evicted = self.sudo().browse(id_ for id_, in self.env.cr.fetchall())
+        if evicted:
+            _logger.info(f"Evicting {len(evicted)} cached catering reports")
+            evicted.unlink()
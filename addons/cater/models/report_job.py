@@ -0,0 +1,228 @@
+from odoo import models, fields, api, _
+from odoo.tools import SQL
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Wizard fields copied onto a job, so it survives the transient wizard
+JOB_REPORT_FIELDS = [
+    'report_type', 'date_from', 'date_to', 'partner_ids', 'event_type', 'export_format', 'detail_rows', 'batch_mode',
+]
+
+# Runs of a job interrupted without finishing (worker killed, time limit)
+# before it is marked as failed instead of queued again
+JOB_MAX_ATTEMPTS = 2
+
+
+class CateringReportJob(models.Model):
+    _name = 'cater.report.job'
+    _description = 'Catering Report Job'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char('Job', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', 'Requested By', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    company_id = fields.Many2one('res.company', 'Company', required=True, readonly=True,
+                                 default=lambda self: self.env.company)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], string='Status', default='queued', required=True, readonly=True, tracking=True, index=True)
+    progress = fields.Float('Progress (%)', readonly=True)
+    attempt_count = fields.Integer('Attempts', readonly=True)
+    date_started = fields.Datetime('Started On', readonly=True)
+    date_done = fields.Datetime('Finished On', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', 'Report File', readonly=True, ondelete='set null')
+    error = fields.Text('Error', readonly=True)
+
+    # Report parameters, as set on the wizard
+    report_type = fields.Selection(
+        selection=lambda self: self.env['cater.report.wizard']._fields['report_type'].selection,
+        string='Report Type', required=True, readonly=True)
+    date_from = fields.Date('From Date', required=True, readonly=True)
+    date_to = fields.Date('To Date', required=True, readonly=True)
+    partner_ids = fields.Many2many('res.partner', string='Customers', readonly=True)
+    event_type = fields.Selection(
+        selection=lambda self: self.env['cater.report.wizard']._fields['event_type'].selection,
+        string='Event Type', readonly=True)
+    export_format = fields.Selection(
+        selection=lambda self: self.env['cater.report.wizard']._fields['export_format'].selection,
+        string='Export Format', required=True, readonly=True)
+    detail_rows = fields.Boolean('Detail Rows', readonly=True)
+    batch_mode = fields.Boolean('One Report per Customer', readonly=True)
+
+    @api.model
+    def _enqueue(self, wizard):
+        """Create a job from the report wizard and wake up the job runner"""
+        values = wizard._convert_to_write({name: wizard[name] for name in JOB_REPORT_FIELDS})
+        report_name = dict(wizard._fields['report_type'].selection)[wizard.report_type]
+        values['name'] = f"{report_name} ({wizard.date_from} - {wizard.date_to})"
+        job = self.create(values)
+        job.message_subscribe(partner_ids=job.user_id.partner_id.ids)
+        self.env.ref('cater.catering_report_job_cron').sudo()._trigger()
+        return job
+
+    @api.model
+    def _cron_process_jobs(self, limit=10, auto_commit=True):
+        """Cron job generating queued reports, oldest first.
+
+        Each job runs with the requester's access rights and commits its
+        progress, so users can follow it and a failure only affects one job.
+        """
+        self._recover_stale_jobs(auto_commit)
+        jobs = self.search([('state', '=', 'queued')], order='id', limit=limit)
+        for job in jobs:
+            job._process(auto_commit)
+        if auto_commit and len(jobs) == limit:
+            # More jobs may be waiting: run again right away
+            self.env.ref('cater.catering_report_job_cron')._trigger()
+
+    @api.model
+    def _recover_stale_jobs(self, auto_commit=True):
+        """Queue again the running jobs without progress for too long, or fail them.
+
+        A running job touches its write date when it starts and whenever it
+        progresses (each chunk of detail rows or batch customers); one left
+        unchanged for cater.report_job_timeout_minutes (default 60) was
+        interrupted. It is queued again, up to JOB_MAX_ATTEMPTS runs.
+        """
+        minutes = int(self.env['ir.config_parameter'].sudo().get_param('cater.report_job_timeout_minutes', 60))
+        stale = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(minutes=minutes)),
+        ])
+        for job in stale:
+            if job.attempt_count < JOB_MAX_ATTEMPTS:
+                _logger.warning(f"Report job {job.id} was interrupted, queuing it again")
+                job.write({'state': 'queued', 'progress': 0})
+                continue
+            _logger.warning(f"Report job {job.id} was interrupted {job.attempt_count} times, giving up")
+            job.write({
+                'state': 'failed',
+                'error': _("The report generation was interrupted too many times."),
+                'date_done': fields.Datetime.now(),
+            })
+            job._notify_requester(_("The report %s could not be generated: it took too long.", job.name), 'danger')
+        if stale:
+            self._commit(auto_commit)
+
+    def _process(self, auto_commit=True):
+        """Generate the report of the job and hand the file over to the requester"""
+        self.ensure_one()
+        self.write({
+            'state': 'running',
+            'progress': 0,
+            'attempt_count': self.attempt_count + 1,
+            'date_started': fields.Datetime.now(),
+        })
+        self._commit(auto_commit)
+        try:
+            attachment = self._generate_report(auto_commit)
+        except Exception as e:
+            if auto_commit:
+                self.env.cr.rollback()
+            _logger.exception(f"Report job {self.id} failed")
+            self.write({'state': 'failed', 'error': str(e), 'date_done': fields.Datetime.now()})
+            self._notify_requester(_("The report %s could not be generated: %s", self.name, e), 'danger')
+            self._commit(auto_commit)
+            return
+        
+        if attachment.res_model == 'cater.report.cache':
+            # Served from the report cache: the job gets its own copy
+            attachment = attachment.sudo().copy({'res_model': self._name, 'res_id': self.id})
+        else:
+            attachment.sudo().write({'res_model': self._name, 'res_id': self.id})
+        self.write({
+            'state': 'done',
+            'progress': 100,
+            'attachment_id': attachment.id,
+            'date_done': fields.Datetime.now(),
+        })
+        self.message_post(
+            body=_("Your report %s is ready.", self.name),
+            attachment_ids=attachment.ids,
+            partner_ids=self.user_id.partner_id.ids,
+        )
+        self._notify_requester(_("Your report %s is ready.", self.name), 'success')
+        self._commit(auto_commit)
+
+    def _generate_report(self, auto_commit=True):
+        """Run the report wizard as the requester and return the report attachment"""
+        wizard_values = self._convert_to_write({name: self[name] for name in JOB_REPORT_FIELDS})
+        wizard = self.env['cater.report.wizard'].with_user(self.user_id).with_company(self.company_id).with_context(
+            cater_report_attachment=True,
+            cater_report_job=True,
+        ).create(wizard_values)
+        
+        def progress(done, total):
+            self._set_progress(done, total, auto_commit)
+        
+        if self.detail_rows and not self.batch_mode and self.export_format == 'xlsx':
+            return wizard._export_detail_to_excel(progress)
+        if self.detail_rows and not self.batch_mode and self.export_format == 'csv':
+            return wizard._export_detail_to_csv(progress)
+        return wizard.action_generate_report(progress)
+
+    @api.model
+    def _cron_cleanup_report_files(self):
+        """Cron job removing the finished jobs and export files past their retention.
+
+        Retention: cater.report_file_retention_days (default 30). Unlinking a
+        job removes its attachment; the filestore garbage collector then drops
+        files no attachment refers to anymore.
+        """
+        days = int(self.env['ir.config_parameter'].sudo().get_param('cater.report_file_retention_days', 30))
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        jobs = self.sudo().search([('state', 'in', ['done', 'failed']), ('date_done', '<', cutoff)])
+        
+        # Export files left behind by wizards deleted without the ORM
+        self.env.cr.execute(SQL(
+            """
+            SELECT a.id
+              FROM ir_attachment a
+         LEFT JOIN cater_report_wizard w ON w.id = a.res_id
+             WHERE a.res_model = 'cater.report.wizard'
+               AND a.create_date < %s
+               AND w.id IS NULL
+            """,
+            cutoff,
+        ))
+        orphans = self.env['ir.attachment'].sudo().browse(id_ for id_, in self.env.cr.fetchall())
+        if jobs or orphans:
+            _logger.info(f"Removing {len(jobs)} report jobs and {len(orphans)} orphaned export files")
+            jobs.unlink()
+            orphans.unlink()
+
+    def _set_progress(self, done, total, auto_commit=True):
+        # Plain SQL: progress updates must not go through tracking and chatter.
+        # The write date tells the job is alive, see _recover_stale_jobs().
+        self.env.cr.execute(SQL(
+            "UPDATE cater_report_job SET progress = %s, write_date = NOW() AT TIME ZONE 'UTC' WHERE id = %s",
+            round(done * 100 / total, 1) if total else 100, self.id,
+        ))
+        self.invalidate_recordset(['progress', 'write_date'])
+        self._commit(auto_commit)
+
+    def _notify_requester(self, message, notification_type):
+        """Show a notification to the requester if they are connected"""
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'type': notification_type,
+            'title': _("Catering Report"),
+            'message': message,
+        })
+
+    def _commit(self, auto_commit):
+        if auto_commit:
+            self.env.cr.commit()
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self.attachment_id.id}?download=true',
+            'target': 'self'
+        }
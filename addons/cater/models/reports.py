@@ -1,8 +1,78 @@
-from odoo import models, fields, api, tools, _
+from odoo import models, fields, api, tools, _, Command
+from odoo.tools import SQL, split_every
+from odoo.tools.pdf import merge_pdf
 from datetime import datetime, timedelta
-import base64
+from dateutil.relativedelta import relativedelta
+import csv
+import hashlib
 import io
+import os
+import shutil
+import tempfile
 import xlsxwriter
+import zipfile
+
+# Detail export: report type -> model listed one row per record
+DETAIL_MODELS = {
+    'feedback_summary': 'cater.feedback',
+    'satisfaction_trends': 'cater.feedback',
+    'booking_analysis': 'cater.event.booking',
+    'financial_summary': 'cater.event.booking',
+    'performance_metrics': 'cater.event.booking',
+}
+
+# Detail export columns per model: (header, field path)
+DETAIL_COLUMNS = {
+    'cater.event.booking': [
+        ('Reference', 'name'),
+        ('Event', 'event_name'),
+        ('Customer', 'partner_id.name'),
+        ('Event Type', 'event_type'),
+        ('Event Date', 'event_date'),
+        ('Venue', 'venue'),
+        ('Guests', 'guest_count'),
+        ('Status', 'state'),
+        ('Total', 'total_amount'),
+        ('Paid', 'paid_amount'),
+        ('Balance Due', 'balance_due'),
+    ],
+    'cater.feedback': [
+        ('Booking', 'booking_id.name'),
+        ('Event', 'booking_id.event_name'),
+        ('Customer', 'partner_id.name'),
+        ('Rating', 'rating'),
+        ('Food Quality', 'food_quality'),
+        ('Service Quality', 'service_quality'),
+        ('Presentation', 'presentation'),
+        ('Timeliness', 'timeliness'),
+        ('Would Recommend', 'would_recommend'),
+        ('Source', 'source'),
+        ('Submitted On', 'create_date'),
+        ('Comments', 'comments'),
+    ],
+}
+
+# Booking states counted as revenue by the financial and performance reports
+REVENUE_STATES = ['confirmed', 'in_progress', 'completed']
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Records loaded per batch by the detail export
+DETAIL_CHUNK_SIZE = 1000
+
+# Detail rows rendered per PDF section
+PDF_SECTION_SIZE = 500
+
+# Customers rendered per worker task by the batch mode
+BATCH_CHUNK_SIZE = 20
+
+# Wizard fields each per-customer report of a batch is generated with
+BATCH_REPORT_FIELDS = ['report_type', 'date_from', 'date_to', 'event_type', 'export_format', 'detail_rows']
+
+# PDF summary report per report type; the others use the generic summary
+PDF_REPORTS = {
+    'feedback_summary': 'cater.feedback_analysis_report',
+}
 
 
 class CateringReport(models.TransientModel):
@@ -39,9 +109,67 @@ class CateringReport(models.TransientModel):
         ('xlsx', 'Excel'),
         ('csv', 'CSV')
     ], string='Export Format', default='pdf')
+    detail_rows = fields.Boolean('Detail Rows',
+                                 help='Export one row per booking or feedback instead of the summary; '
+                                      'PDF reports list them after the summary')
+    batch_mode = fields.Boolean('One Report per Customer',
+                                help='Generate a separate report for each selected customer, or for every '
+                                     'catering customer when none is selected, bundled in a ZIP file')
 
-    def action_generate_report(self):
-        """Generate the selected report"""
+    def action_enqueue_report(self):
+        """Queue the selected report to be generated in the background"""
+        self.ensure_one()
+        job = self.env['cater.report.job']._enqueue(self)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'title': _('Report queued'),
+                'message': _("%s will be posted on the report job when it is ready.", job.name),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    def action_generate_report(self, progress=None):
+        """Generate the selected report, reusing a cached file when the data is unchanged.
+
+        progress(done, total) is called as long reports progress, see _generate_report().
+        """
+        self.ensure_one()
+        if self.batch_mode and not self.env.context.get('cater_report_job'):
+            # Batches can take long: only in report jobs
+            return self.action_enqueue_report()
+        if not self._is_cacheable():
+            return self._generate_report(progress)
+        Cache = self.env['cater.report.cache']
+        watermark = Cache._get_watermark()
+        attachment = Cache._get(self, watermark)
+        if not attachment:
+            attachment = Cache._put(self, self.with_context(cater_report_attachment=True)._generate_report(progress), watermark)
+        return self._download_action(attachment)
+
+    def _is_cacheable(self):
+        """Every report file is cached, except streamed detail CSVs which are never stored"""
+        return not (self.export_format == 'csv' and self.detail_rows)
+
+    def _generate_report(self, progress=None):
+        """Generate the selected report.
+
+        Batches and detail rows report their progress through the optional
+        progress(done, total) callback; summaries are a few grouped queries.
+        """
+        if self.batch_mode:
+            return self._generate_batch_report(progress)
+        if self.detail_rows and self.export_format == 'xlsx':
+            return self._export_detail_to_excel(progress)
+        if self.detail_rows and self.export_format == 'csv':
+            # Streamed by the controller straight from the database
+            return {
+                'type': 'ir.actions.act_url',
+                'url': f'/cater/report/{self.id}/detail.csv',
+                'target': 'self'
+            }
         if self.report_type == 'feedback_summary':
             return self._generate_feedback_summary()
         elif self.report_type == 'satisfaction_trends':
@@ -53,6 +181,58 @@ class CateringReport(models.TransientModel):
         elif self.report_type == 'performance_metrics':
             return self._generate_performance_metrics()
 
+    def _generate_batch_report(self, progress=None):
+        """Generate one report per customer and bundle them in a ZIP attachment.
+
+        Customers are rendered by chunks, one after the other, each under a
+        rolled back savepoint so that the wizards and attachments created on
+        the way are not kept. Batches run in report jobs, in the cron
+        worker's own cursor: no extra connection nor thread is used.
+        progress(done, total) is called after each chunk when given.
+        """
+        partners = self.partner_ids or self.env['res.partner'].search([('is_catering_customer', '=', True)])
+        values = self._convert_to_write({name: self[name] for name in BATCH_REPORT_FIELDS})
+        
+        output = self._new_export_file('.zip')
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+            done = 0
+            for chunk in split_every(BATCH_CHUNK_SIZE, partners.ids):
+                for name, content in self._render_batch_chunk(chunk, values):
+                    archive.writestr(name, content)
+                done += len(chunk)
+                if progress:
+                    progress(done, len(partners))
+        
+        title = dict(self._fields['report_type'].selection)[self.report_type]
+        attachment = self._store_export_file(output, f"{title} ({self.date_from} - {self.date_to}).zip", 'application/zip')
+        return self._download_action(attachment)
+
+    def _render_batch_chunk(self, partner_ids, values):
+        """Render the reports of some customers under a rolled back savepoint"""
+        savepoint = self.env.cr.savepoint()
+        try:
+            return self._render_batch_files(partner_ids, values)
+        finally:
+            savepoint.close(rollback=True)
+
+    def _render_batch_files(self, partner_ids, values):
+        """Render the report of each customer; returns a list of (file name, content)"""
+        Wizard = self.with_context(cater_report_attachment=True)
+        files = []
+        for partner in self.env['res.partner'].browse(partner_ids):
+            wizard = Wizard.create(dict(values, partner_ids=[Command.set(partner.ids)]))
+            attachment = wizard._generate_report_file()
+            name = (partner.display_name or '').replace('/', '-')
+            files.append((f"{name} ({partner.id}) - {attachment.name}", attachment.raw))
+        return files
+
+    def _generate_report_file(self):
+        """Attachment of the selected report, including detail CSVs which are otherwise streamed"""
+        wizard = self.with_context(cater_report_attachment=True)
+        if self.detail_rows and self.export_format == 'csv':
+            return wizard._export_detail_to_csv()
+        return wizard._generate_report()
+
     def _get_base_domain(self):
         """Get base domain for filtering"""
         domain = [
@@ -65,58 +245,51 @@ class CateringReport(models.TransientModel):
             
         return domain
 
+    def _get_booking_domain(self):
+        """Base domain restricted to the selected event type, for bookings"""
+        domain = self._get_base_domain()
+        if self.event_type:
+            domain.append(('event_type', '=', self.event_type))
+        return domain
+
     def _generate_feedback_summary(self):
         """Generate feedback summary report"""
         domain = self._get_base_domain()
         
-        # Get feedback data
-        feedback_data = self.env['cater.feedback'].search(domain)
-        
-        # Get related bookings for additional context
-        booking_domain = self._get_base_domain()
-        if self.event_type:
-            booking_domain.append(('event_type', '=', self.event_type))
-        
-        bookings = self.env['cater.event.booking'].search(booking_domain)
+        # Related bookings for additional context
+        booking_domain = self._get_booking_domain()
+        Booking = self.env['cater.event.booking']
         
         # Calculate statistics
-        total_feedback = len(feedback_data)
-        total_bookings = len(bookings.filtered(lambda b: b.state == 'completed'))
+        stats = self.env['cater.feedback.stats'].compute(domain)
+        total_feedback = stats['total_feedback']
+        total_bookings = Booking.search_count(booking_domain + [('state', '=', 'completed')])
         response_rate = (total_feedback / total_bookings * 100) if total_bookings > 0 else 0
         
-        # Rating analysis
-        ratings = feedback_data.mapped('rating')
-        avg_rating = sum([int(r) for r in ratings if r]) / len(ratings) if ratings else 0
-        
-        rating_distribution = {}
-        for rating in ['1', '2', '3', '4', '5']:
-            count = len(feedback_data.filtered(lambda f: f.rating == rating))
-            rating_distribution[rating] = count
-        
-        # Detailed ratings
-        detailed_ratings = {
-            'food_quality': sum(feedback_data.mapped('food_quality')) / total_feedback if total_feedback else 0,
-            'service_quality': sum(feedback_data.mapped('service_quality')) / total_feedback if total_feedback else 0,
-            'presentation': sum(feedback_data.mapped('presentation')) / total_feedback if total_feedback else 0,
-            'timeliness': sum(feedback_data.mapped('timeliness')) / total_feedback if total_feedback else 0,
-        }
-        
-        # Recommendation rate
-        recommendations = len(feedback_data.filtered('would_recommend'))
-        recommendation_rate = (recommendations / total_feedback * 100) if total_feedback > 0 else 0
-        
         data = {
             'report_title': 'Customer Feedback Summary Report',
             'date_range': f"{self.date_from} to {self.date_to}",
             'total_feedback': total_feedback,
             'total_bookings': total_bookings,
             'response_rate': round(response_rate, 1),
-            'avg_rating': round(avg_rating, 2),
-            'rating_distribution': rating_distribution,
-            'detailed_ratings': detailed_ratings,
-            'recommendation_rate': round(recommendation_rate, 1),
-            'feedback_details': feedback_data,
-            'bookings': bookings
+            'avg_rating': stats['avg_rating'],
+            'std_rating': stats['std_rating'],
+            'rating_percentiles': stats['percentiles'],
+            'rating_distribution': stats['distribution'],
+            'detailed_ratings': {field: values['mean'] for field, values in stats['sub_scores'].items()},
+            'recommendation_rate': stats['recommendation_rate'],
+            'nps': stats['nps'],
+            'score_correlations': stats['correlations'],
+            'tables': [
+                ('Net Promoter Buckets', ['Promoters', 'Passives', 'Detractors', 'NPS'], [
+                    (stats['nps']['promoters'], stats['nps']['passives'], stats['nps']['detractors'], stats['nps']['score']),
+                ]),
+                ('Detailed Scores', ['Score', 'Mean', 'Std Dev', 'Correlation with Rating'], [
+                    (field.replace('_', ' ').title(), values['mean'], values['std'],
+                     stats['correlations'].get('rating', {}).get(field, ''))
+                    for field, values in stats['sub_scores'].items()
+                ]),
+            ],
         }
         
         if self.export_format == 'xlsx':
@@ -129,95 +302,297 @@ class CateringReport(models.TransientModel):
     def _generate_satisfaction_trends(self):
         """Generate satisfaction trends report"""
         domain = self._get_base_domain()
-        feedback_data = self.env['cater.feedback'].search(domain)
+        groups = self.env['cater.feedback']._read_group(domain, ['create_date:month', 'rating'], ['__count'])
         
-        # Group by month
+        # Fold the rating groups of each month: [rating total, feedback count]
         monthly_data = {}
-        for feedback in feedback_data:
-            month_key = feedback.create_date.strftime('%Y-%m')
-            if month_key not in monthly_data:
-                monthly_data[month_key] = []
-            monthly_data[month_key].append(int(feedback.rating) if feedback.rating else 0)
-        
-        # Calculate monthly averages
-        trends = []
-        for month, ratings in monthly_data.items():
-            avg_rating = sum(ratings) / len(ratings) if ratings else 0
-            trends.append({
-                'month': datetime.strptime(month, '%Y-%m').strftime('%B %Y'),
-                'avg_rating': round(avg_rating, 2),
-                'total_feedback': len(ratings)
-            })
-        
-        trends.sort(key=lambda x: x['month'])
+        for month, rating, count in groups:
+            totals = monthly_data.setdefault(month, [0, 0])
+            totals[0] += int(rating or 0) * count
+            totals[1] += count
+        
+        # Months in chronological order, not in the alphabetical order of their names
+        trends = [{
+            'month': month.strftime('%B %Y'),
+            'avg_rating': round(total / count, 2) if count else 0,
+            'total_feedback': count
+        } for month, (total, count) in sorted(monthly_data.items())]
         
         data = {
             'report_title': 'Customer Satisfaction Trends',
             'date_range': f"{self.date_from} to {self.date_to}",
             'trends': trends,
-            'total_periods': len(trends)
+            'total_periods': len(trends),
+            'tables': [('Monthly Trends', ['Month', 'Average Rating', 'Feedback'], [
+                (trend['month'], trend['avg_rating'], trend['total_feedback']) for trend in trends
+            ])],
         }
         
         if self.export_format == 'xlsx':
             return self._export_to_excel(data, 'satisfaction_trends')
+        elif self.export_format == 'csv':
+            return self._export_to_csv(data, 'satisfaction_trends')
         else:
             return self._export_to_pdf(data, 'satisfaction_trends')
 
-    def _generate_booking_analysis(self):
-        """Generate booking analysis report"""
-        booking_domain = self._get_base_domain()
-        if self.event_type:
-            booking_domain.append(('event_type', '=', self.event_type))
-        
-        bookings = self.env['cater.event.booking'].search(booking_domain)
-        
-        # Analysis by event type
+    def _can_use_stats_rollup(self):
+        """Whole-month ranges without a customer filter can be read from cater.stats.monthly"""
+        return (
+            not self.partner_ids
+            and self.date_from.day == 1
+            and self.date_to == self.date_to + relativedelta(day=31)
+            and self.env['cater.stats.monthly']._can_serve_user()
+        )
+
+    def _generate_booking_analysis_from_stats(self):
+        """Build the booking analysis payload from the monthly statistics rollup"""
+        rows = self.env['cater.stats.monthly'].read_summary(
+            self.date_from, self.date_to, event_type=self.event_type,
+            groupby=['event_type', 'state']
+        )
+        return self._build_booking_analysis(
+            (row['event_type'], row['state'], row['booking_count'], row['revenue'], row['guest_total'])
+            for row in rows
+        )
+
+    def _build_booking_analysis(self, groups):
+        """Booking analysis payload from (event type, state, count, revenue, guests) groups"""
         event_type_analysis = {}
-        for booking in bookings:
-            event_type = booking.event_type
-            if event_type not in event_type_analysis:
-                event_type_analysis[event_type] = {
-                    'count': 0,
-                    'total_revenue': 0,
-                    'avg_guests': 0,
-                    'guests_total': 0
-                }
-            
-            event_type_analysis[event_type]['count'] += 1
-            event_type_analysis[event_type]['total_revenue'] += booking.total_amount
-            event_type_analysis[event_type]['guests_total'] += booking.guest_count
-        
-        # Calculate averages
-        for event_type, data in event_type_analysis.items():
-            if data['count'] > 0:
-                data['avg_revenue'] = data['total_revenue'] / data['count']
-                data['avg_guests'] = data['guests_total'] / data['count']
-        
-        # Status analysis
-        status_analysis = {}
-        for status in ['draft', 'confirmed', 'in_progress', 'completed', 'cancelled']:
-            count = len(bookings.filtered(lambda b: b.state == status))
-            status_analysis[status] = count
-        
-        data = {
+        status_analysis = dict.fromkeys(['draft', 'confirmed', 'in_progress', 'completed', 'cancelled'], 0)
+        for event_type, state, count, revenue, guests in groups:
+            if not count:
+                continue
+            analysis = event_type_analysis.setdefault(event_type, {
+                'count': 0,
+                'total_revenue': 0,
+                'avg_guests': 0,
+                'guests_total': 0
+            })
+            analysis['count'] += count
+            analysis['total_revenue'] += revenue or 0
+            analysis['guests_total'] += guests or 0
+            status_analysis[state] = status_analysis.get(state, 0) + count
+        
+        for analysis in event_type_analysis.values():
+            analysis['avg_revenue'] = analysis['total_revenue'] / analysis['count']
+            analysis['avg_guests'] = analysis['guests_total'] / analysis['count']
+        
+        Booking = self.env['cater.event.booking']
+        event_types = dict(Booking._fields['event_type']._description_selection(self.env))
+        states = dict(Booking._fields['state']._description_selection(self.env))
+        return {
             'report_title': 'Booking Analysis Report',
             'date_range': f"{self.date_from} to {self.date_to}",
-            'total_bookings': len(bookings),
-            'total_revenue': sum(bookings.mapped('total_amount')),
+            'total_bookings': sum(status_analysis.values()),
+            'total_revenue': sum(analysis['total_revenue'] for analysis in event_type_analysis.values()),
             'event_type_analysis': event_type_analysis,
             'status_analysis': status_analysis,
-            'bookings': bookings
+            'tables': [
+                ('By Event Type', ['Event Type', 'Bookings', 'Revenue', 'Average Revenue', 'Average Guests'], [
+                    (event_types.get(event_type, event_type), analysis['count'], analysis['total_revenue'],
+                     round(analysis['avg_revenue'], 2), round(analysis['avg_guests'], 1))
+                    for event_type, analysis in event_type_analysis.items()
+                ]),
+                ('By Status', ['Status', 'Bookings'], [
+                    (states.get(state, state), count) for state, count in status_analysis.items()
+                ]),
+            ],
         }
+
+    def _generate_booking_analysis(self):
+        """Generate booking analysis report"""
+        if self._can_use_stats_rollup():
+            data = self._generate_booking_analysis_from_stats()
+        else:
+            data = self._build_booking_analysis(self.env['cater.event.booking']._read_group(
+                self._get_booking_domain(), ['event_type', 'state'],
+                ['__count', 'total_amount:sum', 'guest_count:sum'],
+            ))
         
         if self.export_format == 'xlsx':
             return self._export_to_excel(data, 'booking_analysis')
+        elif self.export_format == 'csv':
+            return self._export_to_csv(data, 'booking_analysis')
         else:
             return self._export_to_pdf(data, 'booking_analysis')
 
+    def _generate_financial_groups_from_stats(self):
+        """Financial totals by month and by event type, from the monthly statistics rollup"""
+        Stats = self.env['cater.stats.monthly']
+        event_types = dict(self.env['cater.event.booking']._fields['event_type']._description_selection(self.env))
+
+        def amounts(row):
+            return row['booking_count'], row['revenue'], row['paid_amount'], row['balance_due']
+
+        by_month = [
+            (row['month:month'].strftime('%B %Y'), *amounts(row))
+            for row in Stats.read_summary(self.date_from, self.date_to, states=REVENUE_STATES,
+                                          event_type=self.event_type, groupby=['month:month'])
+            if row['booking_count']
+        ]
+        by_event_type = [
+            (event_types.get(row['event_type'], row['event_type']), *amounts(row))
+            for row in Stats.read_summary(self.date_from, self.date_to, states=REVENUE_STATES,
+                                          event_type=self.event_type, groupby=['event_type'])
+            if row['booking_count']
+        ]
+        return by_month, by_event_type
+
+    def _generate_financial_summary(self):
+        """Generate financial summary report.
+
+        Revenue, paid and outstanding amounts of the confirmed bookings by
+        month, event type and customer, and the posted customer invoices
+        linked to them, each from one grouped query.
+        """
+        Booking = self.env['cater.event.booking']
+        domain = self._get_booking_domain() + [('state', 'in', REVENUE_STATES)]
+        aggregates = ['__count', 'total_amount:sum', 'paid_amount:sum', 'balance_due:sum']
+        event_types = dict(Booking._fields['event_type']._description_selection(self.env))
+        
+        if self._can_use_stats_rollup():
+            by_month, by_event_type = self._generate_financial_groups_from_stats()
+        else:
+            by_month = [
+                (month.strftime('%B %Y'), *amounts)
+                for month, *amounts in Booking._read_group(domain, ['create_date:month'], aggregates)
+            ]
+            by_event_type = [
+                (event_types.get(event_type, event_type), *amounts)
+                for event_type, *amounts in Booking._read_group(domain, ['event_type'], aggregates)
+            ]
+        # The rollup has no customer dimension: always from the bookings
+        by_customer = [
+            (partner.display_name, *amounts)
+            for partner, *amounts in Booking._read_group(
+                domain, ['partner_id'], aggregates, order='total_amount:sum desc'
+            )
+        ]
+        
+        invoices = []
+        if self.env['account.move'].has_access('read'):
+            invoices = [
+                (month.strftime('%B %Y') if month else _('Not dated'), *amounts)
+                for month, *amounts in self.env['account.move']._read_group([
+                    ('catering_booking_id', 'in', Booking._search(domain)),
+                    ('move_type', 'in', ['out_invoice', 'out_refund']),
+                    ('state', '=', 'posted'),
+                ], ['invoice_date:month'], ['__count', 'amount_total_signed:sum', 'amount_residual_signed:sum'])
+            ]
+        
+        amount_headers = ['Bookings', 'Revenue', 'Paid', 'Outstanding']
+        data = {
+            'report_title': 'Financial Summary Report',
+            'date_range': f"{self.date_from} to {self.date_to}",
+            'total_bookings': sum(values[1] for values in by_month),
+            'total_revenue': sum(values[2] for values in by_month),
+            'total_paid': sum(values[3] for values in by_month),
+            'total_outstanding': sum(values[4] for values in by_month),
+            'total_invoiced': sum(values[2] for values in invoices),
+            'total_invoice_residual': sum(values[3] for values in invoices),
+            'tables': [
+                ('By Month', ['Month'] + amount_headers, by_month),
+                ('By Event Type', ['Event Type'] + amount_headers, by_event_type),
+                ('By Customer', ['Customer'] + amount_headers, by_customer),
+                ('Customer Invoices', ['Invoice Month', 'Invoices', 'Invoiced', 'Unpaid'], invoices),
+            ],
+        }
+        
+        if self.export_format == 'xlsx':
+            return self._export_to_excel(data, 'financial_summary')
+        elif self.export_format == 'csv':
+            return self._export_to_csv(data, 'financial_summary')
+        else:
+            return self._export_to_pdf(data, 'financial_summary')
+
+    def _generate_performance_metrics(self):
+        """Generate performance metrics report.
+
+        Guests per event, revenue per guest, feedback response rate and the
+        delay between the event and its feedback, per event type.
+        """
+        Booking = self.env['cater.event.booking']
+        domain = self._get_booking_domain() + [('state', 'in', REVENUE_STATES)]
+        event_types = dict(Booking._fields['event_type']._description_selection(self.env))
+        latency = self._get_feedback_latency(domain)
+        
+        rows = []
+        totals = [0, 0, 0.0, 0]
+        for event_type, count, guests, revenue in Booking._read_group(
+            domain, ['event_type'], ['__count', 'guest_count:sum', 'total_amount:sum']
+        ):
+            feedback_count, avg_hours, median_hours = latency.get(event_type, (0, None, None))
+            rows.append((
+                event_types.get(event_type, event_type),
+                count,
+                round(guests / count, 1) if count else 0,
+                round((revenue or 0) / guests, 2) if guests else 0,
+                feedback_count,
+                round(feedback_count / count * 100, 1) if count else 0,
+                round(avg_hours, 1) if avg_hours is not None else '',
+                round(median_hours, 1) if median_hours is not None else '',
+            ))
+            for index, value in enumerate((count, guests, revenue or 0, feedback_count)):
+                totals[index] += value
+        count, guests, revenue, feedback_count = totals
+        
+        data = {
+            'report_title': 'Performance Metrics Report',
+            'date_range': f"{self.date_from} to {self.date_to}",
+            'total_events': count,
+            'guests_per_event': round(guests / count, 1) if count else 0,
+            'revenue_per_guest': round(revenue / guests, 2) if guests else 0,
+            'response_rate': round(feedback_count / count * 100, 1) if count else 0,
+            'tables': [(
+                'By Event Type',
+                ['Event Type', 'Events', 'Guests per Event', 'Revenue per Guest', 'Feedback',
+                 'Response Rate (%)', 'Avg Feedback Delay (h)', 'Median Feedback Delay (h)'],
+                rows,
+            )],
+        }
+        
+        if self.export_format == 'xlsx':
+            return self._export_to_excel(data, 'performance_metrics')
+        elif self.export_format == 'csv':
+            return self._export_to_csv(data, 'performance_metrics')
+        else:
+            return self._export_to_pdf(data, 'performance_metrics')
+
+    def _get_feedback_latency(self, domain):
+        """Feedback count and average/median hours from event to feedback per event type.
+
+        The booking search query applies the record rules; the feedback of
+        each booking is joined on it.
+        """
+        Booking = self.env['cater.event.booking']
+        Booking.flush_model(['event_type', 'event_date'])
+        self.env['cater.feedback'].flush_model(['booking_id', 'feedback_date'])
+        query = Booking._search(domain)
+        feedback_alias = 'cater_booking_feedback'
+        query.add_join('JOIN', feedback_alias, 'cater_feedback', SQL(
+            "%s = %s", SQL.identifier(feedback_alias, 'booking_id'), SQL.identifier(query.table, 'id'),
+        ))
+        delay = SQL(
+            "EXTRACT(EPOCH FROM (%s - %s)) / 3600",
+            SQL.identifier(feedback_alias, 'feedback_date'), SQL.identifier(query.table, 'event_date'),
+        )
+        self.env.cr.execute(SQL(
+            """
+            SELECT %s, COUNT(*), AVG(%s), PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY %s)
+              FROM %s
+             WHERE %s
+          GROUP BY 1
+            """,
+            SQL.identifier(query.table, 'event_type'), delay, delay,
+            query.from_clause, query.where_clause,
+        ))
+        return {event_type: (count, avg, median) for event_type, count, avg, median in self.env.cr.fetchall()}
+
     def _export_to_excel(self, data, report_type):
         """Export report to Excel format"""
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+        output = self._new_export_file('.xlsx')
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        workbook.set_properties(self._get_workbook_properties())
         
         # Create worksheet
         worksheet = workbook.add_worksheet(data['report_title'])
@@ -266,17 +641,261 @@ class CateringReport(models.TransientModel):
                 worksheet.write(row, 1, count, cell_format)
                 row += 1
         
+        # Tabular sections: (title, headers, rows)
+        for title, headers, rows in data.get('tables', []):
+            row += 1
+            worksheet.write(row, 0, title, title_format)
+            row += 1
+            worksheet.write_row(row, 0, headers, header_format)
+            row += 1
+            for values in rows:
+                worksheet.write_row(row, 0, values, cell_format)
+                row += 1
+        
+        workbook.close()
+        
+        attachment = self._store_export_file(output, f"{data['report_title']}.xlsx", XLSX_MIMETYPE)
+        return self._download_action(attachment)
+
+    def _export_detail_to_excel(self, progress=None):
+        """Export one row per booking or feedback to Excel in bounded memory.
+
+        The workbook is written row by row to a temporary file (xlsxwriter
+        constant_memory mode) from rows read in chunks, and the file is
+        then copied into the filestore as is.
+        """
+        _model, _domain, columns = self._get_detail_spec()
+        title = dict(self._fields['report_type'].selection)[self.report_type]
+        output = self._new_export_file('.xlsx')
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        workbook.set_properties(self._get_workbook_properties())
+        worksheet = workbook.add_worksheet(title[:31])
+        header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3', 'border': 1})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+        
+        worksheet.write_row(0, 0, [header for header, _path in columns], header_format)
+        worksheet.freeze_panes(1, 0)
+        row = 1
+        for values in self._iter_detail_rows(progress):
+            for col, value in enumerate(values):
+                if isinstance(value, datetime):
+                    worksheet.write_datetime(row, col, value, date_format)
+                else:
+                    worksheet.write(row, col, value)
+            row += 1
         workbook.close()
-        output.seek(0)
         
-        attachment = self.env['ir.attachment'].create({
-            'name': f"{data['report_title']}.xlsx",
+        attachment = self._store_export_file(output, f"{title} - Details.xlsx", XLSX_MIMETYPE)
+        return self._download_action(attachment)
+
+    def _export_detail_to_csv(self, progress=None):
+        """Export one row per booking or feedback to a CSV attachment.
+
+        Interactive downloads are streamed by the controller instead; this is
+        used by background report jobs, which need a file to hand over.
+        """
+        _model, _domain, columns = self._get_detail_spec()
+        title = dict(self._fields['report_type'].selection)[self.report_type]
+        output = self._new_export_file('.csv')
+        with open(output, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow([header for header, _path in columns])
+            for values in self._iter_detail_rows(progress):
+                writer.writerow([
+                    fields.Datetime.to_string(value) if isinstance(value, datetime) else value
+                    for value in values
+                ])
+        
+        attachment = self._store_export_file(output, f"{title} - Details.csv", 'text/csv')
+        return self._download_action(attachment)
+
+    def _get_detail_spec(self):
+        """Model, domain and columns of the detail export of the selected report"""
+        model = DETAIL_MODELS[self.report_type]
+        domain = self._get_base_domain()
+        if self.event_type and model == 'cater.event.booking':
+            domain.append(('event_type', '=', self.event_type))
+        return model, domain, DETAIL_COLUMNS[model]
+
+    def _iter_detail_rows(self, progress=None):
+        """Yield the export values of every matching record, oldest first.
+
+        Only the exported columns are selected, DETAIL_CHUNK_SIZE rows at a
+        time after the last id read, so memory does not grow with the number
+        of rows and commits in between (job progress) do not matter.
+        progress(done, total) is called after each chunk when given.
+        """
+        model, domain, _columns = self._get_detail_spec()
+        total = self.env[model].search_count(domain) if progress else 0
+        last_id, done = 0, 0
+        while True:
+            query, selects, formatters = self._get_detail_query(last_id, DETAIL_CHUNK_SIZE)
+            self.env.cr.execute(query.select(SQL.identifier(query.table, 'id'), *selects))
+            rows = self.env.cr.fetchall()
+            for _id, *values in rows:
+                yield [format_value(value) for format_value, value in zip(formatters, values)]
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            done += len(rows)
+            if progress:
+                progress(done, total)
+            if len(rows) < DETAIL_CHUNK_SIZE:
+                break
+
+    def _get_detail_select(self):
+        """SELECT of all the detail export rows and the formatter of each column"""
+        query, selects, formatters = self._get_detail_query()
+        return query.select(*selects), formatters
+
+    def _get_detail_query(self, after_id=0, limit=None):
+        """Search query of the detail export rows, with the SQL and formatter of each column.
+
+        Built from the model's search query, so record rules apply; related
+        names are LEFT JOINed. Rows come out oldest first, from after_id.
+        """
+        model, domain, columns = self._get_detail_spec()
+        Model = self.env[model]
+        if after_id:
+            domain = domain + [('id', '>', after_id)]
+        query = Model._search(domain, order='id', limit=limit)
+        selects, formatters, joined = [], [], set()
+        for _header, path in columns:
+            *related, name = path.split('.')
+            table, Current = query.table, Model
+            for field_name in related:
+                Comodel = self.env[Current._fields[field_name].comodel_name]
+                alias = query.make_alias(table, field_name)
+                if alias not in joined:
+                    query.add_join('LEFT JOIN', alias, Comodel._table, SQL(
+                        "%s = %s", SQL.identifier(alias, 'id'), SQL.identifier(table, field_name),
+                    ))
+                    joined.add(alias)
+                Current.flush_model([field_name])
+                table, Current = alias, Comodel
+            Current.flush_model([name])
+            selects.append(SQL.identifier(table, name))
+            formatters.append(self._get_detail_formatter(Current._fields[name]))
+        return query, selects, formatters
+
+    def _get_detail_formatter(self, field):
+        """Function turning a raw value of the field into its export value.
+
+        Selections export their label, booleans Yes/No and empty values ''.
+        """
+        if field.type == 'selection':
+            labels = dict(field._description_selection(self.env))
+            return lambda value: labels.get(value, value or '')
+        if field.type == 'boolean':
+            yes, no = _('Yes'), _('No')
+            return lambda value: yes if value else no
+        return lambda value: '' if value is False or value is None else value
+
+    def _new_export_file(self, suffix):
+        """Path of a new temporary file.
+
+        _store_export_file() consumes the file; it is also removed if the
+        transaction rolls back before that.
+        """
+        handle, path = tempfile.mkstemp(prefix='cater_report_', suffix=suffix)
+        os.close(handle)
+        self.env.cr.postrollback.add(lambda: os.path.exists(path) and os.unlink(path))
+        return path
+
+    def _get_workbook_properties(self):
+        """Workbook metadata; the creation date is pinned to the report period so
+        identical data gives identical files, which are then stored only once"""
+        return {
+            'title': dict(self._fields['report_type'].selection)[self.report_type],
+            'created': datetime.combine(self.date_to, datetime.min.time()),
+        }
+
+    def _find_export_attachment(self, checksum):
+        """File with the same content already exported by a wizard.
+
+        Searched with the user's access rights, so only files they can read
+        are reused. Files of the report cache are not: they are deleted with
+        their entry, which would take the file from the new export too. The
+        filestore keeps a single copy of identical contents anyway.
+        """
+        return self.env['ir.attachment'].search([
+            ('res_model', '=', self._name),
+            ('checksum', '=', checksum),
+        ], order='id desc', limit=1)
+
+    def _create_export_attachment(self, name, mimetype, raw):
+        """Attachment of an export, linked to the wizard.
+
+        A file identical to one already exported is not stored again: the
+        existing attachment is returned instead.
+        """
+        Attachment = self.env['ir.attachment']
+        attachment = self._find_export_attachment(Attachment._compute_checksum(raw))
+        if attachment:
+            return attachment
+        return Attachment.create({
+            'name': name,
             'type': 'binary',
-            'datas': base64.b64encode(output.read()),
-            'store_fname': f"{report_type}_{fields.Date.today()}.xlsx",
-            'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            'raw': raw,
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
         })
-        
+
+    def _store_export_file(self, path, name, mimetype):
+        """Create an attachment from a file on disk without loading it in memory.
+
+        The file is hashed in blocks and copied into the filestore under its
+        checksum, as ir.attachment would do, skipping the base64 round trip.
+        Databases storing attachments in the database get the raw bytes.
+        As in _create_export_attachment(), identical exports are reused.
+        """
+        Attachment = self.env['ir.attachment']
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as file:
+                raw = file.read()
+            os.unlink(path)
+            return self._create_export_attachment(name, mimetype, raw)
+        
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                sha1.update(block)
+        checksum = sha1.hexdigest()
+        attachment = self._find_export_attachment(checksum)
+        if attachment:
+            os.unlink(path)
+            return attachment
+        
+        attachment = Attachment.create({
+            'name': name,
+            'type': 'binary',
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        fname = f'{checksum[:2]}/{checksum}'
+        full_path = Attachment._full_path(fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            shutil.copyfile(path, full_path)
+            # Removed by the filestore garbage collector if this transaction rolls back
+            Attachment._mark_for_gc(fname)
+        
+        # store_fname, checksum and file_size are not writable through the ORM
+        self.env.cr.execute(SQL(
+            "UPDATE ir_attachment SET store_fname = %s, checksum = %s, file_size = %s WHERE id = %s",
+            fname, checksum, os.path.getsize(path), attachment.id,
+        ))
+        attachment.invalidate_recordset(['store_fname', 'checksum', 'file_size'])
+        os.unlink(path)
+        return attachment
+
+    def _download_action(self, attachment):
+        """Action downloading the attachment, or the attachment itself when asked
+        through the cater_report_attachment context key (jobs, report cache)"""
+        if self.env.context.get('cater_report_attachment'):
+            return attachment
         return {
             'type': 'ir.actions.act_url',
             'url': f'/web/content/{attachment.id}?download=true',
@@ -285,9 +904,6 @@ class CateringReport(models.TransientModel):
 
     def _export_to_csv(self, data, report_type):
         """Export report to CSV format"""
-        import csv
-        import io
-        
         output = io.StringIO()
         writer = csv.writer(output)
         
@@ -307,22 +923,46 @@ class CateringReport(models.TransientModel):
             for rating, count in data['rating_distribution'].items():
                 writer.writerow([f"{rating} Stars", count])
         
-        csv_data = output.getvalue().encode('utf-8')
+        for title, headers, rows in data.get('tables', []):
+            writer.writerow([])
+            writer.writerow([title])
+            writer.writerow(headers)
+            writer.writerows(rows)
         
-        attachment = self.env['ir.attachment'].create({
-            'name': f"{data['report_title']}.csv",
-            'type': 'binary',
-            'datas': base64.b64encode(csv_data),
-            'store_fname': f"{report_type}_{fields.Date.today()}.csv",
-            'mimetype': 'text/csv'
-        })
+        csv_data = output.getvalue().encode('utf-8')
         
-        return {
-            'type': 'ir.actions.act_url',
-            'url': f'/web/content/{attachment.id}?download=true',
-            'target': 'self'
-        }
+        attachment = self._create_export_attachment(f"{data['report_title']}.csv", 'text/csv', csv_data)
+        return self._download_action(attachment)
 
     def _export_to_pdf(self, data, report_type):
-        """Export report to PDF format"""
-        return self.env.ref(f'cater.action_report_{report_type}').report_action(self, data=data)
+        """Export report to PDF format.
+
+        The summary is rendered on its own. With detail rows, the rows follow
+        in sections of PDF_SECTION_SIZE, read a chunk at a time with only the
+        exported columns, each rendered separately; the documents are then
+        merged, so no QWeb pass or wkhtmltopdf run holds more than one section.
+        """
+        report = self.env.ref(PDF_REPORTS.get(report_type, 'cater.action_report_summary'))
+        documents = [self._render_pdf(report, data)]
+        if self.detail_rows:
+            _model, _domain, columns = self._get_detail_spec()
+            section_report = self.env.ref('cater.action_report_detail_section')
+            rows = self._iter_detail_rows()
+            for section, page in enumerate(split_every(PDF_SECTION_SIZE, rows), start=1):
+                documents.append(self._render_pdf(section_report, {
+                    'report_title': data['report_title'],
+                    'date_range': data['date_range'],
+                    'section': section,
+                    'headers': [header for header, _path in columns],
+                    'rows': [
+                        [fields.Datetime.to_string(value) if isinstance(value, datetime) else value for value in values]
+                        for values in page
+                    ],
+                }))
+        pdf = merge_pdf(documents) if len(documents) > 1 else documents[0]
+        attachment = self._create_export_attachment(f"{data['report_title']}.pdf", 'application/pdf', pdf)
+        return self._download_action(attachment)
+
+    def _render_pdf(self, report, data):
+        pdf, _report_format = self.env['ir.actions.report']._render_qweb_pdf(report, self.ids, data=data)
+        return pdf
@@ -0,0 +1,272 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+from dateutil.relativedelta import relativedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Columns maintained by the rollup, in the order produced by _rollup_select()
+ROLLUP_COLUMNS = [
+    'month', 'event_type', 'state',
+    'booking_count', 'guest_total', 'revenue', 'paid_amount', 'balance_due',
+    'feedback_count', 'rating_1_count', 'rating_2_count', 'rating_3_count',
+    'rating_4_count', 'rating_5_count',
+]
+
+# Precommit data holding the bookings changed in the transaction, see _mark_bookings_dirty()
+DIRTY_BOOKINGS_KEY = 'cater.stats.monthly.dirty_bookings'
+
+
+class CateringStatsMonthly(models.Model):
+    _name = 'cater.stats.monthly'
+    _description = 'Monthly Booking and Feedback Statistics'
+    _order = 'month desc, event_type, state'
+    _log_access = False
+    _sql_constraints = [
+        ('unique_month_type_state', 'UNIQUE(month, event_type, state)',
+         'Only one statistics row per month, event type and status is allowed!'),
+    ]
+
+    month = fields.Date('Month', required=True, index=True, readonly=True)
+    event_type = fields.Selection(selection='_selection_event_type', string='Event Type', readonly=True)
+    state = fields.Selection(selection='_selection_state', string='Status', readonly=True)
+
+    booking_count = fields.Integer('Bookings', readonly=True)
+    guest_total = fields.Integer('Guests', readonly=True)
+    revenue = fields.Float('Revenue', readonly=True)
+    paid_amount = fields.Float('Amount Paid', readonly=True)
+    balance_due = fields.Float('Balance Due', readonly=True)
+
+    # Rating histogram of the feedback left on the bookings of this row
+    feedback_count = fields.Integer('Feedback', readonly=True)
+    rating_1_count = fields.Integer('1 Star', readonly=True)
+    rating_2_count = fields.Integer('2 Stars', readonly=True)
+    rating_3_count = fields.Integer('3 Stars', readonly=True)
+    rating_4_count = fields.Integer('4 Stars', readonly=True)
+    rating_5_count = fields.Integer('5 Stars', readonly=True)
+
+    @api.model
+    def _selection_event_type(self):
+        return self.env['cater.event.booking']._fields['event_type'].selection
+
+    @api.model
+    def _selection_state(self):
+        return self.env['cater.event.booking']._fields['state'].selection
+
+    @api.model
+    def _rollup_select(self, months=None, booking_ids=None):
+        """Grouped query over the base tables producing rows in ROLLUP_COLUMNS order.
+
+        Bookings are bucketed on the month of their creation date; feedback is
+        counted in the bucket of the booking it belongs to. The query can be
+        restricted to some months, or to some bookings.
+        """
+        where = SQL("TRUE")
+        if months:
+            months = sorted(months)
+            where = SQL(
+                "b.create_date >= %s AND b.create_date < %s AND date_trunc('month', b.create_date)::date = ANY(%s)",
+                months[0], months[-1] + relativedelta(months=1), months,
+            )
+        elif booking_ids is not None:
+            where = SQL("b.id = ANY(%s)", sorted(booking_ids))
+        return SQL("""
+            SELECT date_trunc('month', b.create_date)::date,
+                   b.event_type,
+                   b.state,
+                   COUNT(b.id),
+                   COALESCE(SUM(b.guest_count), 0),
+                   COALESCE(SUM(b.total_amount), 0),
+                   COALESCE(SUM(b.paid_amount), 0),
+                   COALESCE(SUM(b.balance_due), 0),
+                   COUNT(f.id),
+                   COUNT(f.id) FILTER (WHERE f.rating = '1'),
+                   COUNT(f.id) FILTER (WHERE f.rating = '2'),
+                   COUNT(f.id) FILTER (WHERE f.rating = '3'),
+                   COUNT(f.id) FILTER (WHERE f.rating = '4'),
+                   COUNT(f.id) FILTER (WHERE f.rating = '5')
+              FROM cater_event_booking b
+         LEFT JOIN cater_feedback f ON f.booking_id = b.id
+             WHERE %s
+          GROUP BY 1, 2, 3
+        """, where)
+
+    @api.model
+    def _refresh_months(self, months=None):
+        """Recompute the rollup rows of the given months (all months when None)"""
+        self.env.flush_all()
+        if months:
+            months = sorted(months)
+            self.env.cr.execute(SQL("DELETE FROM cater_stats_monthly WHERE month = ANY(%s)", months))
+        else:
+            # The rebuilt rows include the pending changes of the transaction
+            self.env.cr.precommit.data.pop(DIRTY_BOOKINGS_KEY, None)
+            self.env.cr.execute(SQL("DELETE FROM cater_stats_monthly"))
+        self.env.cr.execute(SQL(
+            "INSERT INTO cater_stats_monthly (%s) %s",
+            SQL(", ").join(SQL.identifier(column) for column in ROLLUP_COLUMNS),
+            self._rollup_select(months),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _mark_bookings_dirty(self, booking_ids, created=False):
+        """Record the contribution to the rollup of bookings about to change.
+
+        Must be called before the change reaches the database. The first call
+        for a booking in a transaction reads its current contribution (none
+        for ``created`` bookings); right before the commit, the difference
+        with its final contribution is added to the rollup rows.
+        """
+        precommit = self.env.cr.precommit
+        dirty = precommit.data.setdefault(DIRTY_BOOKINGS_KEY, {'ids': set(), 'before': {}})
+        new_ids = {booking_id for booking_id in booking_ids if booking_id} - dirty['ids']
+        if not new_ids:
+            return
+        if not dirty['ids']:
+            precommit.add(self._flush_dirty_bookings)
+        dirty['ids'].update(new_ids)
+        if created:
+            return
+        self.env.cr.execute(self._rollup_select(booking_ids=new_ids))
+        for row in self.env.cr.fetchall():
+            key = tuple(row[:3])
+            previous = dirty['before'].get(key, (0,) * len(row[3:]))
+            dirty['before'][key] = tuple(a + b for a, b in zip(previous, row[3:]))
+
+    def _flush_dirty_bookings(self):
+        """Precommit hook adding the rollup deltas of the bookings changed in the transaction"""
+        self.env.flush_all()
+        dirty = self.env.cr.precommit.data.pop(DIRTY_BOOKINGS_KEY, None)
+        if dirty:
+            self.sudo()._apply_deltas(dirty['ids'], dirty['before'])
+
+    @api.model
+    def _apply_deltas(self, booking_ids, before):
+        """Add the change of contribution of the bookings to the rollup rows.
+
+        Rows are upserted with relative updates, so concurrent transactions
+        touching the same month add up instead of overwriting each other;
+        they are locked in key order to avoid deadlocks. Rows left without
+        bookings are removed.
+        """
+        width = len(ROLLUP_COLUMNS) - 3
+        deltas = {key: tuple(-value for value in values) for key, values in before.items()}
+        self.env.cr.execute(self._rollup_select(booking_ids=booking_ids))
+        for row in self.env.cr.fetchall():
+            key = tuple(row[:3])
+            previous = deltas.get(key, (0,) * width)
+            deltas[key] = tuple(a + b for a, b in zip(previous, row[3:]))
+        rows = sorted((key + values for key, values in deltas.items() if any(values)), key=lambda row: row[:3])
+        if not rows:
+            return
+        value_columns = ROLLUP_COLUMNS[3:]
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO cater_stats_monthly AS s (%s) VALUES %s
+            ON CONFLICT (month, event_type, state) DO UPDATE SET %s
+            """,
+            SQL(", ").join(SQL.identifier(column) for column in ROLLUP_COLUMNS),
+            SQL(", ").join(SQL("(%s)", SQL(", ").join(SQL("%s", value) for value in row)) for row in rows),
+            SQL(", ").join(
+                SQL("%s = %s + EXCLUDED.%s", SQL.identifier(column), SQL.identifier('s', column), SQL.identifier(column))
+                for column in value_columns
+            ),
+        ))
+        self.env.cr.execute(SQL(
+            "DELETE FROM cater_stats_monthly WHERE booking_count <= 0 AND (month, event_type, state) IN %s",
+            tuple(row[:3] for row in rows),
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """Rebuild the whole rollup table from the booking and feedback tables"""
+        self.sudo()._refresh_months()
+        _logger.info("Rebuilt monthly catering statistics (%s rows)", self.sudo().search_count([]))
+        return True
+
+    @api.model
+    def _check_consistency(self, months=None):
+        """Compare the rollup with the base tables.
+
+        Returns a list of mismatching rows, each a dict with the bucket key and
+        the stored and expected values. An empty list means the rollup is exact.
+        """
+        self.env.flush_all()
+        key = SQL("s.month = e.month AND s.event_type IS NOT DISTINCT FROM e.event_type "
+                  "AND s.state IS NOT DISTINCT FROM e.state")
+        value_columns = ROLLUP_COLUMNS[3:]
+        stored_filter = SQL("TRUE")
+        if months:
+            stored_filter = SQL("month = ANY(%s)", sorted(months))
+        self.env.cr.execute(SQL(
+            """
+            WITH expected (%s) AS (%s),
+                 stored AS (SELECT %s FROM cater_stats_monthly WHERE %s)
+            SELECT COALESCE(s.month, e.month), COALESCE(s.event_type, e.event_type),
+                   COALESCE(s.state, e.state), %s, %s
+              FROM stored s
+         FULL JOIN expected e ON %s
+             WHERE %s
+            """,
+            SQL(", ").join(SQL.identifier(column) for column in ROLLUP_COLUMNS),
+            self._rollup_select(months),
+            SQL(", ").join(SQL.identifier(column) for column in ROLLUP_COLUMNS),
+            stored_filter,
+            SQL(", ").join(SQL.identifier('s', column) for column in value_columns),
+            SQL(", ").join(SQL.identifier('e', column) for column in value_columns),
+            key,
+            SQL(" OR ").join(
+                SQL("%s IS DISTINCT FROM %s", SQL.identifier('s', column), SQL.identifier('e', column))
+                for column in value_columns
+            ),
+        ))
+        mismatches = []
+        width = len(value_columns)
+        for row in self.env.cr.fetchall():
+            month, event_type, state = row[:3]
+            stored, expected = row[3:3 + width], row[3 + width:]
+            mismatches.append({
+                'month': month,
+                'event_type': event_type,
+                'state': state,
+                'stored': dict(zip(value_columns, stored)),
+                'expected': dict(zip(value_columns, expected)),
+            })
+        return mismatches
+
+    @api.model
+    def _cron_check_consistency(self):
+        """Cron job repairing the months whose rollup drifted from the base tables"""
+        mismatches = self._check_consistency()
+        if not mismatches:
+            return
+        months = {mismatch['month'] for mismatch in mismatches}
+        _logger.warning("Monthly catering statistics out of sync for %s month(s); refreshing", len(months))
+        self.sudo()._refresh_months(months)
+
+    @api.model
+    def read_summary(self, month_from, month_to, states=None, event_type=None, groupby=()):
+        """Read pre-aggregated totals for whole months between two dates (inclusive).
+
+        Returns one dict per group holding the groupby values and the sums of
+        every statistics column.
+        """
+        domain = [
+            ('month', '>=', fields.Date.to_date(month_from).replace(day=1)),
+            ('month', '<=', fields.Date.to_date(month_to)),
+        ]
+        if states:
+            domain.append(('state', 'in', states))
+        if event_type:
+            domain.append(('event_type', '=', event_type))
+        value_columns = ROLLUP_COLUMNS[3:]
+        groupby = list(groupby)
+        rows = self._read_group(domain, groupby, [f'{column}:sum' for column in value_columns])
+        return [dict(zip(groupby + value_columns, row)) for row in rows]
+
+    @api.model
+    def _can_serve_user(self):
+        """The rollup ignores record rules, so only staff may be served from it"""
+        return self.env.user.has_group('cater.catering_staff_group')
@@ -1,154 +1,177 @@
 /** @odoo-module **/
 
-import { Component, onWillStart, useState, xml } from "@odoo/owl";
+import {
+  Component,
+  onMounted,
+  onWillStart,
+  onWillUnmount,
+  useExternalListener,
+  useState,
+  xml,
+} from "@odoo/owl";
 import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+
+// Dashboard panels and the key of state.data each one fills
+const PANELS = {
+  kpis: "kpis",
+  charts: "charts",
+  activity: "recent_activity",
+  feedback: "feedback_summary",
+  upcoming: "upcoming_events",
+  financial: "financial_summary",
+};
+
+// Bus channel and notification type of the live dashboard deltas
+const DASHBOARD_CHANNEL = "cater.dashboard";
+const DASHBOARD_DELTA = "cater.dashboard/delta";
+
+// How often the dashboard asks the server for changes (milliseconds)
+const POLL_INTERVAL = 60000;
 
 class CateringDashboard extends Component {
   setup() {
+    this.orm = useService("orm");
+    this.busService = useService("bus_service");
     this.state = useState({
-      data: null,
-      loading: true,
-      error: null,
+      data: {},
+      loading: Object.fromEntries(Object.keys(PANELS).map((panel) => [panel, true])),
+      errors: {},
+      activityEnd: false,
+    });
+
+    this.watermark = null;
+
+    onWillStart(() => {
+      // Do not wait for the panels: each one renders as soon as it arrives
+      this.loadDashboardData();
     });
 
-    onWillStart(async () => {
-      await this.loadDashboardData();
+    this.onDelta = (delta) => this.applyDelta(delta);
+
+    onMounted(() => {
+      this.pollTimer = setInterval(() => this.refreshChanges(), POLL_INTERVAL);
+      this.busService.subscribe(DASHBOARD_DELTA, this.onDelta);
+      this.busService.addChannel(DASHBOARD_CHANNEL);
+    });
+    onWillUnmount(() => {
+      clearInterval(this.pollTimer);
+      this.busService.unsubscribe(DASHBOARD_DELTA, this.onDelta);
+      this.busService.deleteChannel(DASHBOARD_CHANNEL);
     });
+    useExternalListener(window, "focus", () => this.refreshChanges());
+  }
+
+  loadDashboardData() {
+    return Promise.all([
+      this.loadWatermark(),
+      ...Object.keys(PANELS).map((panel) => this.loadPanel(panel)),
+    ]);
   }
 
-  async loadDashboardData() {
+  async loadWatermark() {
     try {
-      this.state.loading = true;
-      this.state.error = null;
+      this.watermark = await this.orm.call("cater.dashboard", "get_dashboard_watermark", []);
+    } catch (error) {
+      console.error("Error loading dashboard watermark:", error);
+      this.watermark = null;
+    }
+  }
 
-      // Try to access data using the environment services
-      let data = null;
+  async refreshChanges() {
+    // Cheap refresh: only KPIs and new activity, and only when data changed
+    if (!this.watermark || this.refreshing) {
+      return;
+    }
+    this.refreshing = true;
+    try {
+      const changes = await this.orm.call("cater.dashboard", "get_dashboard_changes", [
+        this.watermark,
+      ]);
+      this.watermark = changes.watermark;
+      if (changes.changed) {
+        this.state.data.kpis = changes.kpis;
+        this.mergeActivity(changes.recent_activity);
+      }
+    } catch (error) {
+      console.error("Error refreshing dashboard changes:", error);
+    } finally {
+      this.refreshing = false;
+    }
+  }
 
-      // Method 1: Try using env.services.rpc
-      if (this.env.services && this.env.services.rpc) {
-        try {
-          console.log("Attempting to load data via env.services.rpc...");
-          data = await this.env.services.rpc("/web/dataset/call_kw", {
-            model: "cater.dashboard",
-            method: "get_dashboard_data",
-            args: [],
-            kwargs: {},
-          });
-          console.log("Successfully loaded data via env.services.rpc:", data);
-        } catch (rpcError) {
-          console.error("env.services.rpc failed:", rpcError);
-        }
+  applyDelta(delta) {
+    // Patch the KPIs in place with the increments pushed by the server
+    const kpis = this.state.data.kpis;
+    if (kpis && delta.kpis) {
+      for (const [field, change] of Object.entries(delta.kpis)) {
+        kpis[field] = (kpis[field] || 0) + change;
       }
+    }
+    if (delta.activity) {
+      this.mergeActivity([delta.activity]);
+    }
+    if (delta.refresh) {
+      this.refreshChanges();
+    }
+  }
 
-      // Method 2: Try direct fetch if env.services.rpc failed
-      if (!data) {
-        try {
-          console.log("Attempting to load data via direct fetch...");
-          const response = await fetch("/web/dataset/call_kw", {
-            method: "POST",
-            headers: {
-              "Content-Type": "application/json",
-            },
-            credentials: "include",
-            body: JSON.stringify({
-              jsonrpc: "2.0",
-              method: "call",
-              params: {
-                model: "cater.dashboard",
-                method: "get_dashboard_data",
-                args: [],
-                kwargs: {},
-              },
-              id: Math.floor(Math.random() * 1000000),
-            }),
-          });
+  mergeActivity(entries) {
+    const key = (activity) => `${activity.type}-${activity.id}`;
+    const newKeys = new Set(entries.map(key));
+    const current = (this.state.data.recent_activity || []).filter(
+      (activity) => !newKeys.has(key(activity))
+    );
+    // Keep the older entries the user scrolled to
+    const size = Math.max(10, current.length);
+    this.state.data.recent_activity = [...entries, ...current].slice(0, size);
+  }
 
-          if (response.ok) {
-            const result = await response.json();
-            if (result.result) {
-              data = result.result;
-              console.log("Successfully loaded data via fetch:", data);
-            } else if (result.error) {
-              console.error("Backend error:", result.error);
-            }
-          }
-        } catch (fetchError) {
-          console.error("Fetch method failed:", fetchError);
-        }
-      }
+  async loadOlderActivity() {
+    const activity = this.state.data.recent_activity || [];
+    const last = activity[activity.length - 1];
+    if (!last || !last.cursor) {
+      return;
+    }
+    this.state.loading.activity = true;
+    try {
+      const feed = await this.orm.call("cater.dashboard", "get_activity_feed", [], {
+        limit: 10,
+        before: last.cursor,
+      });
+      this.state.data.recent_activity = [...activity, ...feed.entries];
+      this.state.activityEnd = !feed.next_cursor;
+    } catch (error) {
+      console.error("Error loading older activity:", error);
+    } finally {
+      this.state.loading.activity = false;
+    }
+  }
 
-      // Check if we have valid data
-      if (data && typeof data === "object" && data.kpis) {
-        this.state.data = data;
-        console.log("Successfully loaded real data with values:", {
-          total_bookings: data.kpis.total_bookings,
-          total_revenue: data.kpis.total_revenue,
-          avg_satisfaction: data.kpis.avg_satisfaction,
-          active_customers: data.kpis.active_customers,
-        });
-        return;
+  async loadPanel(panel) {
+    this.state.loading[panel] = true;
+    delete this.state.errors[panel];
+    try {
+      const result = await this.orm.call("cater.dashboard", "get_dashboard_panel", [panel], {
+        debug: Boolean(this.env.debug),
+      });
+      if (this.env.debug) {
+        // In debug mode the server also reports what the panel cost
+        console.debug(`Dashboard panel "${panel}":`, result.debug);
+        this.state.data[PANELS[panel]] = result.data;
+      } else {
+        this.state.data[PANELS[panel]] = result;
       }
-
-      // Fallback to mock data if all methods failed
-      console.warn("All data loading methods failed, using mock data");
-      this.state.error = "Using demo data - unable to connect to backend";
-      this.state.data = this.getMockData();
     } catch (error) {
-      console.error("Error loading dashboard data:", error);
-      this.state.error = "Failed to load dashboard data. Using demo data.";
-      this.state.data = this.getMockData();
+      console.error(`Error loading dashboard panel "${panel}":`, error);
+      this.state.errors[panel] = "Failed to load this section.";
     } finally {
-      this.state.loading = false;
+      this.state.loading[panel] = false;
     }
   }
 
-  getMockData() {
-    return {
-      kpis: {
-        total_bookings: 25,
-        booking_growth: 15.5,
-        total_revenue: 12500.0,
-        revenue_growth: 8.2,
-        avg_satisfaction: 4.3,
-        active_customers: 18,
-      },
-      feedback_summary: {
-        avg_rating: 4.3,
-        response_rate: 75,
-      },
-      recent_activity: [
-        {
-          title: "New Booking Created",
-          description: "Wedding event scheduled for next month",
-        },
-        {
-          title: "Feedback Received",
-          description: "5-star rating for birthday party catering",
-        },
-        {
-          title: "Payment Received",
-          description: "GHS 2,500 payment confirmed",
-        },
-      ],
-      upcoming_events: [
-        {
-          id: 1,
-          name: "Corporate Lunch",
-          customer: "ABC Corp",
-          date: "2025-09-20",
-          guests: 50,
-          status: "Confirmed",
-        },
-        {
-          id: 2,
-          name: "Wedding Reception",
-          customer: "John & Mary",
-          date: "2025-09-25",
-          guests: 150,
-          status: "In Progress",
-        },
-      ],
-    };
+  get hasErrors() {
+    return Object.keys(this.state.errors).length > 0;
   }
 
   formatCurrency(amount) {
@@ -195,19 +218,14 @@ CateringDashboard.template = xml`
     </button>
   </div>
 
-  <div t-if="state.loading" class="text-center">
-    <div class="spinner-border" role="status">
-      <span class="sr-only">Loading...</span>
-    </div>
-    <p class="mt-2">Loading dashboard data...</p>
+  <div t-if="hasErrors" class="alert alert-warning mb-3" role="alert">
+    <i class="fa fa-exclamation-triangle me-2"></i>
+    Some sections could not be loaded. Use Refresh to try again.
   </div>
 
-        <div t-if="state.error" class="alert alert-warning mb-3" role="alert">
-          <i class="fa fa-exclamation-triangle me-2"></i>
-          <t t-esc="state.error"/>
-        </div>  <div t-if="state.data and !state.loading">
+  <div>
     <!-- KPI Cards -->
-    <div class="row">
+    <div class="row" t-att-class="{ 'opacity-50': state.loading.kpis }">
       <div class="col-lg-3 col-md-6 mb-4">
         <div class="card border-left-primary shadow h-100 py-2">
           <div class="card-body">
@@ -304,7 +322,10 @@ CateringDashboard.template = xml`
       <div class="col-lg-6">
         <div class="card shadow mb-4">
           <div class="card-header py-3">
-            <h6 class="m-0 font-weight-bold text-primary">Customer Feedback Summary</h6>
+            <h6 class="m-0 font-weight-bold text-primary">
+              Customer Feedback Summary
+              <i t-if="state.loading.feedback" class="fa fa-circle-o-notch fa-spin ms-2"/>
+            </h6>
           </div>
           <div class="card-body">
             <div class="text-center">
@@ -319,14 +340,21 @@ CateringDashboard.template = xml`
       <div class="col-lg-6">
         <div class="card shadow mb-4">
           <div class="card-header py-3">
-            <h6 class="m-0 font-weight-bold text-primary">Recent Activity</h6>
+            <h6 class="m-0 font-weight-bold text-primary">
+              Recent Activity
+              <i t-if="state.loading.activity" class="fa fa-circle-o-notch fa-spin ms-2"/>
+            </h6>
           </div>
           <div class="card-body">
-            <div t-if="state.data.recent_activity">
+            <div t-if="state.data.recent_activity and state.data.recent_activity.length">
               <div t-foreach="state.data.recent_activity" t-as="activity" t-key="activity_index">
                 <p><strong><t t-esc="activity.title"/></strong><br/>
                 <small class="text-muted"><t t-esc="activity.description"/></small></p>
               </div>
+              <button t-if="!state.activityEnd" class="btn btn-link btn-sm p-0"
+                      t-att-disabled="state.loading.activity" t-on-click="loadOlderActivity">
+                Show older activity
+              </button>
             </div>
             <div t-else="">
               <p class="text-muted">No recent activity</p>
@@ -341,7 +369,10 @@ CateringDashboard.template = xml`
       <div class="col-12">
         <div class="card shadow mb-4">
           <div class="card-header py-3">
-            <h6 class="m-0 font-weight-bold text-primary">Upcoming Events</h6>
+            <h6 class="m-0 font-weight-bold text-primary">
+              Upcoming Events
+              <i t-if="state.loading.upcoming" class="fa fa-circle-o-notch fa-spin ms-2"/>
+            </h6>
           </div>
           <div class="card-body">
             <div class="table-responsive">
@@ -3,3 +3,5 @@ from . import test_catering_models
 from . import test_security
 from . import test_webhook_controllers
 from . import test_whatsapp_integration
+from . import test_dashboard
+from . import test_reports
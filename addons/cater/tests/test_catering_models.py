@@ -1,5 +1,6 @@
 from odoo.tests.common import TransactionCase, tagged
 from odoo.exceptions import ValidationError
+from odoo.addons.cater.models import event_booking
 from datetime import datetime, timedelta
 
 @tagged('cater', 'catering_models')
@@ -158,3 +159,199 @@ class TestCateringModels(TransactionCase):
         
         self.assertEqual(feedback.partner_id, self.partner)
         self.assertEqual(feedback.rating, '5')
+
+    def test_venue_overlap(self):
+        """Bookings overlapping a confirmed booking at the same venue are rejected"""
+        start = (datetime.now() + timedelta(days=20)).replace(hour=14, minute=0, second=0, microsecond=0)
+
+        def book(hours_after, duration=4.0, venue='Labadi Beach Hotel', state='confirmed'):
+            return self.env['cater.event.booking'].create({
+                'partner_id': self.partner.id,
+                'event_name': 'Overlap Event',
+                'event_type': 'corporate',
+                'event_date': start + timedelta(hours=hours_after),
+                'event_duration': duration,
+                'venue': venue,
+                'guest_count': 40,
+                'state': state,
+            })
+
+        first = book(0)
+        self.assertEqual(first.event_end, start + timedelta(hours=4))
+
+        # 3pm starts inside the 2pm-6pm booking
+        with self.assertRaises(ValidationError):
+            book(1, duration=1.0)
+
+        # Back-to-back bookings and other venues are fine
+        book(4)
+        book(1, venue='Kempinski Hotel')
+
+        # Drafts only clash with bookings holding the venue
+        first_draft = book(0, venue='Golden Tulip', state='draft')
+        second_draft = book(2, venue='Golden Tulip', state='draft')
+        first_draft.state = 'confirmed'
+        with self.assertRaises(ValidationError):
+            second_draft.state = 'confirmed'
+
+        # A draft overlapping a confirmed booking can still be cancelled
+        second_draft.state = 'cancelled'
+        self.assertEqual(second_draft.state, 'cancelled')
+
+    def test_venue_availability(self):
+        """Free windows are the gaps between the bookings holding the venue"""
+        day = (datetime.now() + timedelta(days=40)).replace(hour=0, minute=0, second=0, microsecond=0)
+        bookings = [
+            ('Availability Hall', 10, 2.0, 'confirmed'),
+            ('Availability Hall', 16, 3.0, 'draft'),
+            ('Other Hall', 13, 2.0, 'in_progress'),
+        ]
+        for venue, start, duration, state in bookings:
+            self.env['cater.event.booking'].create({
+                'partner_id': self.partner.id,
+                'event_name': 'Availability Event',
+                'event_type': 'wedding',
+                'event_date': day + timedelta(hours=start),
+                'event_duration': duration,
+                'venue': venue,
+                'guest_count': 80,
+                'state': state,
+            })
+
+        availability = self.env['cater.event.booking'].get_venue_availability(
+            'Availability Hall', day.date(), day.date() + timedelta(days=1), min_hours=1,
+        )
+        windows = [(window['start'][11:16], window['end'][11:16]) for window in availability['Availability Hall']]
+        # The draft does not hold the venue; the next day is free all day
+        self.assertEqual(windows, [('08:00', '10:00'), ('12:00', '23:00'), ('08:00', '23:00')])
+
+        weekday = (day + timedelta(days=1)).weekday()
+        only_next_day = self.env['cater.event.booking'].get_venue_availability(
+            ['Availability Hall'], day.date(), day.date() + timedelta(days=1), weekdays=[weekday],
+        )
+        self.assertEqual(len(only_next_day['Availability Hall']), 1)
+
+    def test_batch_confirmation(self):
+        """Several bookings are confirmed at once with one sale order each"""
+        bookings = self.env['cater.event.booking']
+        for index in range(3):
+            booking = self.env['cater.event.booking'].create({
+                'partner_id': self.partner.id,
+                'event_name': f'Batch Event {index}',
+                'event_type': 'corporate',
+                'event_date': datetime.now() + timedelta(days=25, hours=index * 6),
+                'venue': 'Batch Venue',
+                'guest_count': 30,
+            })
+            self.env['cater.booking.menu.line'].create({
+                'booking_id': booking.id,
+                'menu_item_id': self.menu_item.id,
+                'quantity': 30,
+            })
+            bookings |= booking
+        self.env['cater.booking.service.line'].create({
+            'booking_id': bookings[0].id,
+            'service_id': self.service.id,
+            'quantity': 2,
+        })
+
+        bookings.action_confirm()
+
+        self.assertEqual(set(bookings.mapped('state')), {'confirmed'})
+        self.assertEqual(len(bookings.sale_order_id), 3)
+        products = bookings.sale_order_id.order_line.product_id
+        self.assertEqual(sorted(products.mapped('name')), ['Additional Waiter', 'Jollof Rice with Chicken'])
+        self.assertEqual(bookings[0].sale_order_id.partner_id, self.partner)
+        for booking in bookings:
+            self.assertEqual(
+                len(booking.message_ids.filtered(lambda message: 'Booking confirmed' in (message.body or ''))), 1
+            )
+
+        # Confirmation messages are queued, then sent once by the cron
+        self.assertTrue(all(bookings.mapped('confirmation_pending')))
+        bookings._cron_send_confirmations(auto_commit=False)
+        self.assertFalse(any(bookings.mapped('confirmation_pending')))
+
+    def test_menu_item_product_link(self):
+        """Menu items get one product, created on first use and kept in sync"""
+        self.assertFalse(self.menu_item.product_id)
+        product = self.menu_item._get_products()
+        self.assertEqual(self.menu_item.product_id, product)
+        self.assertEqual(product.list_price, 25.0)
+
+        # Later lookups are served from the record cache
+        with self.assertQueryCount(0):
+            self.assertEqual(self.menu_item._get_products(), product)
+
+        self.menu_item.write({'name': 'Jollof Rice with Grilled Chicken', 'price_per_person': 30.0})
+        self.assertEqual(product.name, 'Jollof Rice with Grilled Chicken')
+        self.assertEqual(product.list_price, 30.0)
+
+        # A service with the same name gets a product of its own
+        namesake = self.env['cater.service'].create({
+            'name': 'Jollof Rice with Grilled Chicken',
+            'service_type': 'other',
+            'price': 10.0,
+        })
+        self.assertNotEqual(namesake._get_products(), product)
+
+        # A product left by the former lookup by name is adopted, not duplicated
+        legacy = self.env['product.product'].create({'name': 'Legacy Waiter', 'type': 'service'})
+        service = self.env['cater.service'].create({
+            'name': 'Legacy Waiter',
+            'service_type': 'other',
+            'price': 10.0,
+        })
+        self.assertEqual(service._get_products(), legacy)
+
+    def test_recompute_totals(self):
+        """Batch totals match the per-booking computation, and the maintenance recompute repairs them"""
+        bookings = self.env['cater.event.booking'].create([{
+            'partner_id': self.partner.id,
+            'event_name': f'Recompute Event {index}',
+            'event_type': 'corporate',
+            'event_date': datetime.now() + timedelta(days=40 + index),
+            'venue': f'Recompute Venue {index}',
+            'guest_count': 20,
+            'paid_amount': 100.0,
+            'menu_line_ids': [(0, 0, {'menu_item_id': self.menu_item.id, 'quantity': 20 + index})],
+            'service_line_ids': [(0, 0, {'service_id': self.service.id, 'quantity': 1})],
+        } for index in range(3)])
+
+        # A price change recomputes every booking with grouped line sums
+        self.patch(event_booking, 'TOTALS_GROUPED_THRESHOLD', 2)
+        self.menu_item.price_per_person = 27.5
+        for booking, quantity in zip(bookings, [20, 21, 22]):
+            subtotal = quantity * 27.5 + 150.0
+            self.assertAlmostEqual(booking.subtotal, subtotal)
+            self.assertAlmostEqual(booking.total_amount, subtotal * 1.15)
+            self.assertAlmostEqual(booking.deposit_amount, subtotal * 1.15 * 0.5)
+            self.assertAlmostEqual(booking.balance_due, subtotal * 1.15 - 100.0)
+
+        expected = bookings.read(['menu_total', 'service_total', 'subtotal', 'tax_amount',
+                                  'total_amount', 'deposit_amount', 'balance_due'])
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE cater_event_booking SET total_amount = 0, balance_due = 0 WHERE id = ANY(%s)", [bookings.ids])
+        bookings.invalidate_recordset()
+
+        # Resume after the first booking: it is left as is
+        Param = self.env['ir.config_parameter'].sudo()
+        Param.set_param('cater.recompute_totals_last_id', bookings[0].id)
+        updated = self.env['cater.event.booking']._recompute_all_totals(chunk_size=1, auto_commit=False)
+        self.assertGreaterEqual(updated, 2)
+        self.assertFalse(Param.get_param('cater.recompute_totals_last_id'))
+        self.assertEqual(bookings[0].total_amount, 0)
+        self.assertEqual(bookings[1:].read(list(expected[0])), expected[1:])
+
+        # Up-to-date bookings are not written again
+        self.assertEqual(bookings[1:]._recompute_totals(), [])
+        self.assertEqual(bookings[0]._recompute_totals(), [bookings[0].id])
+        self.assertEqual(bookings[0].read(list(expected[0])), expected[:1])
+
+        # Totals dropping below the amount paid are rejected
+        self.env.cr.execute("DELETE FROM cater_booking_menu_line WHERE booking_id = %s", [bookings[0].id])
+        self.env.cr.execute("UPDATE cater_event_booking SET paid_amount = 1000 WHERE id = %s", [bookings[0].id])
+        bookings[0].invalidate_recordset()
+        with self.assertRaises(ValidationError):
+            bookings[0]._recompute_totals()
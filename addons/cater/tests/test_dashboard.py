@@ -0,0 +1,261 @@
+import json
+from odoo.tests.common import TransactionCase, tagged
+from odoo.exceptions import UserError
+from odoo.addons.cater.models.dashboard import DASHBOARD_PANELS
+from datetime import datetime, timedelta
+
+
+@tagged('cater', 'catering_dashboard')
+class TestCateringDashboard(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.Dashboard = self.env['cater.dashboard']
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Dashboard Customer',
+            'mobile': '+233241230000',
+            'is_catering_customer': True,
+        })
+
+        category = self.env['cater.menu.category'].create({'name': 'Dashboard Dishes'})
+        self.menu_item = self.env['cater.menu.item'].create({
+            'name': 'Banku with Tilapia',
+            'category_id': category.id,
+            'price_per_person': 40.0,
+            'minimum_order': 10,
+        })
+
+    def _create_booking(self, state='confirmed', venue='Dashboard Venue', days=10):
+        booking = self.env['cater.event.booking'].create({
+            'partner_id': self.partner.id,
+            'event_name': f'Dashboard Event {venue}',
+            'event_type': 'corporate',
+            'event_date': datetime.now() + timedelta(days=days),
+            'venue': venue,
+            'guest_count': 20,
+            'state': state,
+        })
+        self.env['cater.booking.menu.line'].create({
+            'booking_id': booking.id,
+            'menu_item_id': self.menu_item.id,
+            'quantity': 20,
+        })
+        return booking
+
+    def test_monthly_buckets_cover_every_month(self):
+        """Monthly buckets include empty months, oldest first"""
+        buckets = self.Dashboard._get_monthly_buckets('create_date', 6)
+
+        self.assertEqual(len(buckets), 6)
+        month_starts = [bucket['month_start'] for bucket in buckets]
+        self.assertEqual(month_starts, sorted(month_starts))
+        self.assertEqual(month_starts[-1].day, 1)
+
+    def test_monthly_buckets_aggregate_current_month(self):
+        """Confirmed bookings are counted and summed in the current month bucket"""
+        before = self.Dashboard._get_monthly_buckets('create_date', 1)[0]
+
+        first = self._create_booking(venue='Venue A')
+        second = self._create_booking(venue='Venue B')
+        self._create_booking(state='draft', venue='Venue C')
+
+        after = self.Dashboard._get_monthly_buckets('create_date', 1)[0]
+        self.assertEqual(after['bookings'] - before['bookings'], 2)
+        self.assertAlmostEqual(
+            after['revenue'] - before['revenue'],
+            first.total_amount + second.total_amount
+        )
+
+    def test_revenue_trends_reuse_booking_trends(self):
+        """Revenue trends are derived from the booking trend buckets"""
+        charts = self.Dashboard._get_chart_data()
+
+        self.assertEqual(
+            [item['revenue'] for item in charts['revenue_trends']],
+            [item['revenue'] for item in charts['booking_trends']]
+        )
+        self.assertEqual(len(charts['monthly_performance']), 12)
+
+    def test_stats_rollup_tracks_bookings(self):
+        """The monthly rollup follows booking changes and matches the base tables"""
+        Stats = self.env['cater.stats.monthly']
+        Stats._rebuild()
+        month = datetime.now().date().replace(day=1)
+
+        booking = self._create_booking(venue='Rollup Venue')
+        Stats._flush_dirty_bookings()
+
+        rows = Stats.read_summary(month, month, states=['confirmed'], event_type='corporate')
+        self.assertTrue(rows)
+        self.assertFalse(Stats._check_consistency())
+
+        booking.write({'state': 'cancelled'})
+        Stats._flush_dirty_bookings()
+        self.assertFalse(Stats._check_consistency([month]))
+        cancelled = Stats.read_summary(month, month, states=['cancelled'], event_type='corporate')
+        self.assertGreaterEqual(cancelled[0]['booking_count'], 1)
+
+        # Amount changes and deletions are applied as deltas on the rows
+        booking.write({'paid_amount': 50.0})
+        self._create_booking(venue='Rollup Venue B')
+        Stats._flush_dirty_bookings()
+        self.assertFalse(Stats._check_consistency([month]))
+        booking.unlink()
+        Stats._flush_dirty_bookings()
+        self.assertFalse(Stats._check_consistency([month]))
+
+    def test_dashboard_cache_invalidation(self):
+        """Cached dashboard data is reused until dashboard data changes"""
+        Cache = self.env['cater.dashboard.cache']
+        scope = self.Dashboard._get_cache_scope()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'value': len(calls)}
+
+        first = Cache._get_or_compute(scope, 'test_panel', compute)
+        second = Cache._get_or_compute(scope, 'test_panel', compute)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+        self._create_booking(venue='Cache Venue')
+        Cache._bump_version()
+        third = Cache._get_or_compute(scope, 'test_panel', compute)
+        self.assertEqual(third, {'value': 2})
+
+    def test_dashboard_panels(self):
+        """Each panel can be fetched on its own and matches the full payload"""
+        data = self.Dashboard.get_dashboard_data()
+        self.assertEqual(
+            set(data),
+            {'kpis', 'charts', 'recent_activity', 'feedback_summary', 'upcoming_events', 'financial_summary'}
+        )
+        self.assertEqual(self.Dashboard.get_dashboard_panel('kpis'), data['kpis'])
+
+        with self.assertRaises(UserError):
+            self.Dashboard.get_dashboard_panel('unknown')
+
+    def test_dashboard_changes_since_watermark(self):
+        """The delta endpoint reports no change until bookings change"""
+        watermark = self.Dashboard.get_dashboard_watermark()
+        unchanged = self.Dashboard.get_dashboard_changes(watermark)
+        self.assertFalse(unchanged['changed'])
+        self.assertEqual(unchanged['watermark'], watermark)
+
+        booking = self._create_booking(venue='Watermark Venue')
+        changes = self.Dashboard.get_dashboard_changes(watermark)
+        self.assertTrue(changes['changed'])
+        self.assertNotEqual(changes['watermark'], watermark)
+        self.assertIn('kpis', changes)
+        self.assertIn(booking.id, [a['id'] for a in changes['recent_activity'] if a['type'] == 'booking'])
+
+        # Updates are reported too, from the horizon of the previous watermark
+        watermark = changes['watermark']
+        self.assertLessEqual(datetime.fromisoformat(watermark['since']), booking.write_date)
+        booking.write({'event_name': 'Renamed Watermark Event'})
+        changes = self.Dashboard.get_dashboard_changes(watermark)
+        self.assertTrue(changes['changed'])
+        self.assertIn(booking.id, [a['id'] for a in changes['recent_activity'] if a['type'] == 'booking'])
+
+    def test_booking_confirmation_pushes_delta(self):
+        """Confirming a booking publishes a KPI delta on the dashboard bus channel"""
+        booking = self._create_booking(state='draft', venue='Bus Venue')
+        self.env['bus.bus'].search([]).unlink()
+
+        booking.write({'state': 'confirmed'})
+
+        notifications = self.env['bus.bus'].search([('channel', 'like', 'cater.dashboard')])
+        self.assertEqual(len(notifications), 1)
+        message = json.loads(notifications.message)
+        self.assertEqual(message['type'], 'cater.dashboard/delta')
+        self.assertEqual(message['payload']['kpis']['pending_bookings'], -1)
+        self.assertEqual(message['payload']['activity']['id'], booking.id)
+
+    def test_prewarm_cache(self):
+        """The pre-warming cron fills the shared scopes and records panel timings"""
+        admin = self.env.ref('base.user_admin')
+        scope_key = self.Dashboard.with_user(admin)._get_cache_scope()
+        self.env['cater.dashboard.cache'].search([('scope_key', '=', scope_key)]).unlink()
+
+        self.Dashboard._cron_prewarm_cache()
+
+        cached = self.env['cater.dashboard.cache'].search([('scope_key', '=', scope_key)])
+        self.assertEqual(set(cached.mapped('panel')), set(DASHBOARD_PANELS))
+        timings = self.env['cater.dashboard.timing'].search([('scope_key', '=', scope_key)])
+        self.assertEqual(set(timings.mapped('panel')), set(DASHBOARD_PANELS))
+
+        # A second run finds everything cached and computes nothing
+        self.Dashboard._cron_prewarm_cache()
+        self.assertEqual(
+            self.env['cater.dashboard.timing'].search_count([('scope_key', '=', scope_key)]),
+            len(timings)
+        )
+
+    def test_panel_instrumentation(self):
+        """Computed panels report their cost in debug mode and in the timing table"""
+        self.env['cater.dashboard.cache']._bump_version()
+        Timing = self.env['cater.dashboard.timing']
+        before = Timing.search_count([('panel', '=', 'upcoming')])
+
+        result = self.Dashboard.get_dashboard_panel('upcoming', debug=True)
+        self.assertIn('data', result)
+        self.assertFalse(result['debug']['cached'])
+        self.assertGreater(result['debug']['query_count'], 0)
+        self.assertEqual(Timing.search_count([('panel', '=', 'upcoming')]), before + 1)
+
+        cached = self.Dashboard.get_dashboard_panel('upcoming', debug=True)
+        self.assertTrue(cached['debug']['cached'])
+        self.assertEqual(cached['data'], result['data'])
+
+    def test_booking_figures_match_records(self):
+        """The single-scan KPI and financial figures match the booking records"""
+        self._create_booking(venue='Figures A')
+        self._create_booking(venue='Figures B').write({'paid_amount': 100.0})
+        self._create_booking(state='draft', venue='Figures C')
+
+        month_start = datetime.now().date().replace(day=1)
+        won = self.env['cater.event.booking'].search([
+            ('create_date', '>=', month_start),
+            ('state', 'in', ['confirmed', 'completed']),
+        ])
+        figures = self.Dashboard._get_booking_figures()
+        self.assertEqual(figures['month_count'], len(won))
+        self.assertAlmostEqual(figures['month_revenue'], sum(won.mapped('total_amount')))
+        self.assertAlmostEqual(figures['month_paid'], sum(won.mapped('paid_amount')))
+        self.assertAlmostEqual(figures['month_balance'], sum(won.mapped('balance_due')))
+        self.assertEqual(figures['month_customers'], len(won.partner_id))
+        self.assertEqual(
+            figures['draft_count'],
+            self.env['cater.event.booking'].search_count([('state', '=', 'draft')])
+        )
+
+        financial = self.Dashboard._get_financial_summary()
+        self.assertAlmostEqual(financial['monthly']['revenue'], figures['month_revenue'])
+        self.assertGreaterEqual(financial['yearly']['revenue'], financial['monthly']['revenue'])
+
+    def test_activity_feed_pagination(self):
+        """The activity feed pages through bookings and feedback without gaps"""
+        bookings = self.env['cater.event.booking']
+        for index in range(3):
+            bookings |= self._create_booking(venue=f'Feed Venue {index}')
+        bookings[0].write({'state': 'completed'})
+        self.env['cater.feedback'].create({
+            'booking_id': bookings[0].id,
+            'rating': '4',
+            'feedback_date': bookings[0].event_date + timedelta(hours=24),
+        })
+
+        first = self.Dashboard.get_activity_feed(limit=2, kinds=['booking', 'feedback'])
+        self.assertEqual(len(first['entries']), 2)
+        self.assertTrue(first['next_cursor'])
+        self.assertEqual(first['entries'][0]['type'], 'feedback')
+
+        second = self.Dashboard.get_activity_feed(limit=2, before=first['next_cursor'], kinds=['booking', 'feedback'])
+        seen = [(entry['type'], entry['id']) for entry in first['entries'] + second['entries']]
+        self.assertEqual(len(seen), len(set(seen)))
+        dates = [entry['date'] for entry in first['entries'] + second['entries']]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertIn(f"{self.partner.name} - corporate", [entry['description'] for entry in second['entries'] + first['entries']])
@@ -0,0 +1,358 @@
+from odoo.tests.common import TransactionCase, tagged
+from odoo.addons.cater.models import reports
+from odoo.addons.cater.models.report_job import JOB_MAX_ATTEMPTS
+from datetime import datetime, timedelta
+import io
+import zipfile
+
+
+@tagged('cater', 'catering_reports')
+class TestCateringReports(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.partner = self.env['res.partner'].create({
+            'name': 'Report Customer',
+            'mobile': '+233241239999',
+            'is_catering_customer': True,
+        })
+
+        self.bookings = self.env['cater.event.booking']
+        for index in range(3):
+            self.bookings |= self.env['cater.event.booking'].create({
+                'partner_id': self.partner.id,
+                'event_name': f'Report Event {index}',
+                'event_type': 'wedding',
+                'event_date': datetime.now() + timedelta(days=10 + index),
+                'venue': f'Report Venue {index}',
+                'guest_count': 50,
+            })
+
+    def _create_wizard(self, **values):
+        return self.env['cater.report.wizard'].create(dict({
+            'report_type': 'booking_analysis',
+            'date_from': datetime.now().date().replace(day=1),
+            'date_to': datetime.now().date(),
+        }, **values))
+
+    def test_detail_rows_excel_export(self):
+        """The detail export writes one row per booking into a filestore attachment"""
+        wizard = self._create_wizard(export_format='xlsx', detail_rows=True)
+
+        rows = list(wizard._iter_detail_rows())
+        references = [row[0] for row in rows]
+        for booking in self.bookings:
+            self.assertIn(booking.name, references)
+
+        action = wizard.action_generate_report()
+        attachment = self.env['ir.attachment'].browse(int(action['url'].split('/')[-1].split('?')[0]))
+        self.assertTrue(attachment.checksum)
+        self.assertEqual(attachment.file_size, len(attachment.raw))
+        self.assertTrue(attachment.raw.startswith(b'PK'))
+
+    def test_detail_select_matches_records(self):
+        """The streamed CSV query returns the same rows as the chunked detail export"""
+        wizard = self._create_wizard(export_format='csv', detail_rows=True)
+        action = wizard.action_generate_report()
+        self.assertEqual(action['url'], f'/cater/report/{wizard.id}/detail.csv')
+
+        select, formatters = wizard._get_detail_select()
+        self.env.cr.execute(select)
+        streamed = [
+            [format_value(value) for format_value, value in zip(formatters, row)]
+            for row in self.env.cr.fetchall()
+        ]
+        self.patch(reports, 'DETAIL_CHUNK_SIZE', 2)
+        progress = []
+        self.assertEqual(streamed, list(wizard._iter_detail_rows(lambda done, total: progress.append(done))))
+        self.assertEqual(progress[-1], len(streamed))
+
+    def test_background_report_job(self):
+        """Queued reports are generated by the job runner and posted on the job"""
+        wizard = self._create_wizard(export_format='xlsx', detail_rows=True)
+        action = wizard.action_enqueue_report()
+        self.assertEqual(action['tag'], 'display_notification')
+
+        job = self.env['cater.report.job'].search([], limit=1)
+        self.assertEqual(job.state, 'queued')
+        self.assertEqual(job.report_type, 'booking_analysis')
+
+        job._cron_process_jobs(auto_commit=False)
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.attachment_id.res_model, 'cater.report.job')
+        self.assertEqual(job.attachment_id.res_id, job.id)
+        self.assertIn(job.attachment_id, job.message_ids.attachment_ids)
+
+    def test_stale_report_job_recovery(self):
+        """Running jobs without progress past the timeout are queued again, then failed"""
+        self._create_wizard(export_format='csv').action_enqueue_report()
+        job = self.env['cater.report.job'].search([], limit=1)
+
+        def interrupt(attempts):
+            job.write({'state': 'running', 'attempt_count': attempts})
+            job.flush_recordset()
+            self.env.cr.execute(
+                "UPDATE cater_report_job SET write_date = %s WHERE id = %s",
+                [datetime.now() - timedelta(hours=2), job.id],
+            )
+            job.invalidate_recordset()
+
+        interrupt(1)
+        job._recover_stale_jobs(auto_commit=False)
+        self.assertEqual(job.state, 'queued')
+
+        interrupt(JOB_MAX_ATTEMPTS)
+        job._recover_stale_jobs(auto_commit=False)
+        self.assertEqual(job.state, 'failed')
+        self.assertTrue(job.error)
+
+    def test_export_files_deduplicated(self):
+        """Identical exports share one attachment linked to the wizard that produced it"""
+        def export():
+            wizard = self._create_wizard(export_format='csv')
+            return wizard, wizard.with_context(cater_report_attachment=True)._generate_report()
+
+        wizard, first = export()
+        self.assertEqual((first.res_model, first.res_id), (wizard._name, wizard.id))
+        self.assertEqual(export()[1], first)
+
+        # Files kept in the report cache are not shared: evicting them must not
+        # take the file from other exports
+        action = self._create_wizard(export_format='xlsx').action_generate_report()
+        cached = self.env['ir.attachment'].browse(int(action['url'].split('/')[-1].split('?')[0]))
+        self.assertEqual(cached.res_model, 'cater.report.cache')
+        xlsx = self._create_wizard(export_format='xlsx').with_context(cater_report_attachment=True)._generate_report()
+        self.assertNotEqual(xlsx, cached)
+        self.assertEqual(xlsx.checksum, cached.checksum)
+
+        # A file reused from another export is copied into the cache
+        action = self._create_wizard(export_format='csv').action_generate_report()
+        self.assertNotEqual(int(action['url'].split('/')[-1].split('?')[0]), first.id)
+        self.assertEqual((first.res_model, first.res_id), (wizard._name, wizard.id))
+
+        self.bookings[0].write({'guest_count': 80})
+        self.assertNotEqual(export()[1], first)
+
+    def test_report_files_cleanup(self):
+        """Finished jobs past the retention period are removed with their files"""
+        self._create_wizard(export_format='csv').action_enqueue_report()
+        job = self.env['cater.report.job'].search([], limit=1)
+        job._cron_process_jobs(auto_commit=False)
+        attachment = job.attachment_id
+        self.assertTrue(attachment)
+
+        job._cron_cleanup_report_files()
+        self.assertTrue(job.exists())
+
+        job.date_done = datetime.now() - timedelta(days=31)
+        job._cron_cleanup_report_files()
+        self.assertFalse(job.exists())
+        self.assertFalse(attachment.exists())
+
+    def test_report_cache(self):
+        """Generated files are reused until the reported data changes"""
+        def generate():
+            wizard = self._create_wizard(export_format='xlsx')
+            action = wizard.action_generate_report()
+            return int(action['url'].split('/')[-1].split('?')[0])
+
+        first = generate()
+        self.assertEqual(generate(), first)
+        entry = self.env['cater.report.cache'].search([('attachment_id', '=', first)])
+        self.assertEqual(entry.hit_count, 1)
+
+        self.bookings[0].write({'guest_count': 80})
+        self.assertNotEqual(generate(), first)
+        self.assertFalse(entry.exists())
+
+    def test_report_cache_watermark(self):
+        """The watermark moves with any change to the reported data and predates the generation"""
+        Cache = self.env['cater.report.cache']
+        watermark = Cache._get_watermark()
+        self.bookings[0].write({'venue': 'Renamed Venue'})
+        self.assertNotEqual(Cache._get_watermark(), watermark)
+        watermark = Cache._get_watermark()
+        self.bookings[1].unlink()
+        self.assertNotEqual(Cache._get_watermark(), watermark)
+
+        # A booking created while the report is generated invalidates the entry
+        Wizard = type(self.env['cater.report.wizard'])
+        generate_report = Wizard._generate_report
+
+        def generate_with_concurrent_change(wizard):
+            attachment = generate_report(wizard)
+            self.env['cater.event.booking'].create({
+                'partner_id': self.partner.id,
+                'event_name': 'Concurrent Event',
+                'event_type': 'wedding',
+                'event_date': datetime.now() + timedelta(days=30),
+                'venue': 'Concurrent Venue',
+                'guest_count': 50,
+            })
+            return attachment
+
+        wizard = self._create_wizard(export_format='xlsx')
+        self.patch(Wizard, '_generate_report', generate_with_concurrent_change)
+        wizard.action_generate_report()
+        entry = Cache.search([('key', '=', Cache._get_key(wizard))])
+        self.assertNotEqual(entry.watermark, Cache._get_watermark())
+
+    def test_report_cache_eviction(self):
+        """The least recently used files are evicted beyond the configured count"""
+        self.env['ir.config_parameter'].sudo().set_param('cater.report_cache.max_entries', 1)
+        self._create_wizard(export_format='xlsx').action_generate_report()
+        self._create_wizard(export_format='csv').action_generate_report()
+        entries = self.env['cater.report.cache'].search([])
+        self.assertEqual(len(entries), 1)
+
+    def _generate_data(self, wizard):
+        """Report payload the wizard would export"""
+        self.patch(type(wizard), '_export_to_excel', lambda self, data, report_type: data)
+        return wizard.with_context(cater_report_attachment=True)._generate_report()
+
+    def _create_feedback(self, booking, rating, delay_hours=24, **values):
+        """Feedback left on a completed booking some hours after the event"""
+        booking.write({'state': 'completed'})
+        return self.env['cater.feedback'].create(dict({
+            'booking_id': booking.id,
+            'rating': rating,
+            'feedback_date': booking.event_date + timedelta(hours=delay_hours),
+        }, **values))
+
+    def test_booking_analysis_groups(self):
+        """Booking analysis buckets come from grouped queries"""
+        self.bookings[0].write({'state': 'confirmed'})
+        data = self._generate_data(self._create_wizard(export_format='xlsx', event_type='wedding'))
+
+        self.assertEqual(data['event_type_analysis']['wedding']['count'], 3)
+        self.assertEqual(data['event_type_analysis']['wedding']['guests_total'], 150)
+        self.assertEqual(data['status_analysis']['confirmed'], 1)
+        self.assertEqual(data['status_analysis']['draft'], 2)
+        self.assertEqual(data['total_bookings'], 3)
+
+    def test_feedback_summary_and_trends(self):
+        """Rating distribution and monthly trends are folded from rating groups"""
+        for booking, rating in zip(self.bookings, ['5', '4', '4']):
+            self._create_feedback(booking, rating, would_recommend=rating == '5')
+
+        summary = self._generate_data(self._create_wizard(report_type='feedback_summary', export_format='xlsx'))
+        self.assertEqual(summary['total_feedback'], 3)
+        self.assertEqual(summary['rating_distribution']['4'], 2)
+        self.assertAlmostEqual(summary['avg_rating'], round(13 / 3, 2))
+        self.assertAlmostEqual(summary['recommendation_rate'], round(100 / 3, 1))
+
+        trends = self._generate_data(self._create_wizard(report_type='satisfaction_trends', export_format='xlsx'))
+        self.assertEqual(len(trends['trends']), 1)
+        self.assertEqual(trends['trends'][0]['total_feedback'], 3)
+
+    def test_financial_summary(self):
+        """Financial totals are grouped by month, event type and customer"""
+        self.bookings.write({'state': 'confirmed'})
+        self.bookings[0].write({'paid_amount': 100.0})
+        data = self._generate_data(self._create_wizard(report_type='financial_summary', export_format='xlsx'))
+
+        self.assertEqual(data['total_bookings'], 3)
+        self.assertAlmostEqual(data['total_revenue'], sum(self.bookings.mapped('total_amount')))
+        self.assertAlmostEqual(data['total_paid'], 100.0)
+        self.assertAlmostEqual(data['total_outstanding'], sum(self.bookings.mapped('balance_due')))
+        tables = {title: rows for title, headers, rows in data['tables']}
+        self.assertEqual(tables['By Customer'][0][0], self.partner.display_name)
+        self.assertEqual(tables['By Customer'][0][1], 3)
+        self.assertEqual(len(tables['By Event Type']), 1)
+
+    def test_performance_metrics(self):
+        """Guests per event, revenue per guest and feedback delay per event type"""
+        self.bookings.write({'state': 'confirmed'})
+        self._create_feedback(self.bookings[0], '5', delay_hours=10)
+        self._create_feedback(self.bookings[1], '4', delay_hours=30)
+        data = self._generate_data(self._create_wizard(report_type='performance_metrics', export_format='xlsx'))
+
+        self.assertEqual(data['total_events'], 3)
+        self.assertEqual(data['guests_per_event'], 50)
+        self.assertAlmostEqual(data['response_rate'], round(200 / 3, 1))
+        self.assertAlmostEqual(
+            data['revenue_per_guest'], round(sum(self.bookings.mapped('total_amount')) / 150, 2)
+        )
+        [(title, headers, rows)] = data['tables']
+        feedback_count, avg_delay, median_delay = rows[0][4], rows[0][6], rows[0][7]
+        self.assertEqual(feedback_count, 2)
+        self.assertAlmostEqual(avg_delay, 20.0)
+        self.assertAlmostEqual(median_delay, 20.0)
+
+    def test_feedback_statistics(self):
+        """Rating and sub-score statistics are computed over one fetch"""
+        for booking, rating, food in zip(self.bookings, ['5', '4', '2'], [5, 4, 1]):
+            self._create_feedback(booking, rating, food_quality=food, service_quality=3)
+
+        stats = self.env['cater.feedback.stats'].compute([('booking_id', 'in', self.bookings.ids)])
+        self.assertEqual(stats['total_feedback'], 3)
+        self.assertAlmostEqual(stats['avg_rating'], round(11 / 3, 2))
+        self.assertEqual(stats['percentiles'][50], 4)
+        self.assertEqual(stats['distribution'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(stats['nps'], {'promoters': 1, 'passives': 1, 'detractors': 1, 'score': 0})
+        self.assertAlmostEqual(stats['sub_scores']['food_quality']['mean'], round(10 / 3, 2))
+        self.assertGreater(stats['correlations']['rating']['food_quality'], 0.9)
+        # A constant sub-score has no defined correlation
+        self.assertIsNone(stats['correlations']['rating']['service_quality'])
+
+        metrics = self.env['cater.feedback'].get_satisfaction_metrics()
+        self.assertGreaterEqual(metrics['total_feedback'], 3)
+
+    def test_pdf_detail_sections(self):
+        """PDF detail rows are rendered in fixed-size sections merged after the summary"""
+        rendered = []
+
+        def render_pdf(wizard, report, data):
+            rendered.append((report.report_name, data))
+            return b'%PDF-1.4 section'
+
+        self.patch(reports, 'PDF_SECTION_SIZE', 2)
+        self.patch(reports, 'merge_pdf', b''.join)
+        self.patch(type(self.env['cater.report.wizard']), '_render_pdf', render_pdf)
+        wizard = self._create_wizard(export_format='pdf', detail_rows=True)
+        attachment = wizard.with_context(cater_report_attachment=True)._generate_report()
+
+        self.assertEqual(attachment.mimetype, 'application/pdf')
+        self.assertEqual([name for name, _data in rendered], [
+            'cater.report_summary_template',
+            'cater.report_detail_section_template',
+            'cater.report_detail_section_template',
+        ])
+        sections = [data for _name, data in rendered[1:]]
+        self.assertEqual([len(data['rows']) for data in sections], [2, 1])
+        references = [row[0] for data in sections for row in data['rows']]
+        self.assertEqual(sorted(references), sorted(self.bookings.mapped('name')))
+
+    def test_batch_customer_reports(self):
+        """Batch mode bundles one report per customer in a ZIP file"""
+        self.bookings.write({'state': 'confirmed'})
+        other = self.env['res.partner'].create({
+            'name': 'Other/Customer',
+            'mobile': '+233241238888',
+            'is_catering_customer': True,
+        })
+        wizard = self._create_wizard(
+            report_type='financial_summary', export_format='csv', batch_mode=True,
+            partner_ids=[(6, 0, [self.partner.id, other.id])],
+        )
+        progress = []
+        attachment = wizard.with_context(cater_report_attachment=True)._generate_report(
+            lambda done, total: progress.append((done, total)))
+
+        # Report jobs heartbeat on each chunk of customers
+        self.assertEqual(progress[-1], (2, 2))
+        self.assertEqual(attachment.mimetype, 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(attachment.raw)) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 2)
+            self.assertIn(f"Other-Customer ({other.id}) - Financial Summary Report.csv", names)
+            statement = archive.read(next(name for name in names if name.startswith('Report Customer')))
+        self.assertIn(b'Report Customer', statement)
+
+        # Interactive batch requests are handed over to a report job
+        Job = self.env['cater.report.job']
+        before = Job.search_count([])
+        wizard.action_generate_report()
+        self.assertEqual(Job.search_count([]), before + 1)